@@ -1,47 +1,104 @@
-import csv
+import sys
+import os
+import json
+import hashlib
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from analysis.matcher import KeywordIndex
+from analysis.topic_registry import load_registry
+from ingestion import metrics
+
+# 各レイヤーの出力ラベル
+TOPIC_OTHER = "その他"
+URGENCY_HIGH = "高（具体的な公約・行動）"
+URGENCY_NORMAL = "通常（検討・注視）"
+EVIDENCE_PRESENT = "エビデンスあり（データ言及）"
+EVIDENCE_ABSENT = "エビデンスなし（抽象的）"
+LEVEL_4 = "Level 4: データに基づく具体策"
+LEVEL_3 = "Level 3: 強いコミットメント（根拠弱）"
+LEVEL_2 = "Level 2: 現状分析（具体策弱）"
+LEVEL_1 = "Level 1: 抽象的な議論・ポピュリズム"
 
 class CLODClassifier:
     def __init__(self):
         # 政治的発言の論理的深度（Logical Depth）を評価するためのキーワードベースモデル
-        self.l1_mapping = {
-            "少子化": "少子化対策",
-            "子ども": "子育て支援",
-            "教育": "教育政策",
-            "予算": "財政・予算"
+        # L1 のトピック語彙は e-Stat の統計レジストリと共有する（data/topic_registry.json）
+        self.l1_mapping = load_registry().l1_mapping()
+        # 具体的な行動や公約を示す強い言葉
+        self.strong_keywords = ["約束", "実現", "達成", "目標", "法案", "引き上げ", "倍増"]
+        # 数字や統計への言及
+        self.evidence_keywords = ["％", "パーセント", "万人", "億円", "兆円", "低下", "減少", "統計", "推移"]
+
+        # 全レイヤーの語彙を1つのインデックスにまとめ、本文の走査を1回で済ませる
+        self.index = KeywordIndex(
+            list(self.l1_mapping) + self.strong_keywords + self.evidence_keywords
+        )
+
+    def vocabulary(self):
+        """All keywords the classifier scans for (L1 + L2 + L3), in index order."""
+        return list(self.index.keywords)
+
+    def vocabulary_fingerprint(self):
+        """Hash of the keyword set only; unchanged when just the topic labels or their order change."""
+        payload = json.dumps(sorted(self.index.keywords), ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+    def ruleset_fingerprint(self):
+        """Hash of everything that affects the labels: L1 mapping (in priority order) and the L2/L3 lists."""
+        payload = json.dumps(
+            [list(self.l1_mapping.items()), self.strong_keywords, self.evidence_keywords],
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+    def scan(self, text):
+        """Return the set of vocabulary keywords found in text (single pass)."""
+        return self.index.hits(text)
+
+    def find_matches(self, text):
+        """
+        Return keyword match positions grouped by layer:
+        {"L1": {kw: [starts]}, "L2": {...}, "L3": {...}}
+        """
+        positions = self.index.find(text)
+        return {
+            "L1": {kw: positions[kw] for kw in self.l1_mapping if kw in positions},
+            "L2": {kw: positions[kw] for kw in self.strong_keywords if kw in positions},
+            "L3": {kw: positions[kw] for kw in self.evidence_keywords if kw in positions},
         }
-        
-    def process_layer_1(self, data):
+
+    def process_layer_1(self, data, hits=None):
         # L1: トピック (Topic)
-        text = data.get("voice", "")
-        topic = "その他"
+        if hits is None:
+            hits = self.scan(data.get("voice", ""))
+        topic = TOPIC_OTHER
         for kw, cat in self.l1_mapping.items():
-            if kw in text:
+            if kw in hits:
                 topic = cat
                 break
         data["L1_Topic"] = topic
         return data
         
-    def process_layer_2(self, data):
+    def process_layer_2(self, data, hits=None):
         # L2: コミットメントの強さ (Commitment Level)
-        text = data.get("voice", "")
-        # 具体的な行動や公約を示す強い言葉があるか？
-        strong_keywords = ["約束", "実現", "達成", "目標", "法案", "引き上げ", "倍増"]
-        urgency = "通常（検討・注視）"
-        if any(kw in text for kw in strong_keywords):
-            urgency = "高（具体的な公約・行動）"
+        if hits is None:
+            hits = self.scan(data.get("voice", ""))
+        urgency = URGENCY_NORMAL
+        if any(kw in hits for kw in self.strong_keywords):
+            urgency = URGENCY_HIGH
             
         data["L2_Urgency"] = urgency
         return data
         
-    def process_layer_3(self, data):
+    def process_layer_3(self, data, hits=None):
         # L3: エビデンス・検証可能性 (Actionability & Evidence)
-        text = data.get("voice", "")
-        # 数字や統計に言及しているか？
-        evidence_keywords = ["％", "パーセント", "万人", "億円", "兆円", "低下", "減少", "統計", "推移"]
-        action = "エビデンスなし（抽象的）"
+        if hits is None:
+            hits = self.scan(data.get("voice", ""))
+        action = EVIDENCE_ABSENT
         has_evidence = False
-        if any(kw in text for kw in evidence_keywords):
-            action = "エビデンスあり（データ言及）"
+        if any(kw in hits for kw in self.evidence_keywords):
+            action = EVIDENCE_PRESENT
             has_evidence = True
             
         data["L3_Actionability"] = action
@@ -54,40 +111,144 @@ class CLODClassifier:
         evidence = data.get("L3_Actionability", "")
         
         # L2（コミットメント）と L3（エビデンス）の組み合わせでレベルを決定
-        if urgency == "高（具体的な公約・行動）" and evidence == "エビデンスあり（データ言及）":
-            score = "Level 4: データに基づく具体策"
-        elif urgency == "高（具体的な公約・行動）":
-            score = "Level 3: 強いコミットメント（根拠弱）"
-        elif evidence == "エビデンスあり（データ言及）":
-            score = "Level 2: 現状分析（具体策弱）"
+        if urgency == URGENCY_HIGH and evidence == EVIDENCE_PRESENT:
+            score = LEVEL_4
+        elif urgency == URGENCY_HIGH:
+            score = LEVEL_3
+        elif evidence == EVIDENCE_PRESENT:
+            score = LEVEL_2
         else:
-            score = "Level 1: 抽象的な議論・ポピュリズム"
+            score = LEVEL_1
             
         data["L4_Final_Status"] = score
         return data
         
+    def labels_from_hits(self, hits):
+        """Compute the L1-L4 output columns from a precomputed keyword hit set (no text scan)."""
+        labels = self.process_layer_1({}, hits)
+        labels = self.process_layer_2(labels, hits)
+        labels = self.process_layer_3(labels, hits)
+        return self.process_layer_4(labels)
+
     def predict(self, data):
-        l1_out = self.process_layer_1(data.copy())
-        l2_out = self.process_layer_2(l1_out)
-        l3_out = self.process_layer_3(l2_out)
+        if metrics.ENABLED:
+            return self._predict_instrumented(data)
+        # 本文の走査は1回だけ行い、その結果を L1〜L3 で共有する
+        hits = self.scan(data.get("voice", ""))
+        l1_out = self.process_layer_1(data.copy(), hits)
+        l2_out = self.process_layer_2(l1_out, hits)
+        l3_out = self.process_layer_3(l2_out, hits)
         l4_out = self.process_layer_4(l3_out)
         return l4_out
 
+    def _predict_instrumented(self, data):
+        # 計測有効時だけ通る経路（無効時の predict にはフラグ判定1回分のコストしか足さない）
+        with metrics.span("classifier.scan"):
+            hits = self.scan(data.get("voice", ""))
+        with metrics.span("classifier.layer1"):
+            out = self.process_layer_1(data.copy(), hits)
+        with metrics.span("classifier.layer2"):
+            out = self.process_layer_2(out, hits)
+        with metrics.span("classifier.layer3"):
+            out = self.process_layer_3(out, hits)
+        with metrics.span("classifier.layer4"):
+            return self.process_layer_4(out)
+
+    def classify_frame(self, df, text_column="voice"):
+        """
+        Vectorized L1-L4 classification over a DataFrame column.
+        Returns a copy of df with the same output columns that predict() adds.
+        """
+        import numpy as np
+
+        texts = df[text_column].tolist()
+        n = len(texts)
+        out = df.copy()
+
+        # 語彙ごとのレイヤー属性（L1 は優先順位、L2/L3 はフラグ）を配列化
+        keywords = self.index.keywords
+        kw_id = {kw: i for i, kw in enumerate(keywords)}
+        l1_terms = list(self.l1_mapping)
+        no_topic = len(l1_terms)
+        l1_rank = np.full(len(keywords), no_topic, dtype=np.int32)
+        l1_rank[[kw_id[kw] for kw in l1_terms]] = np.arange(no_topic)
+        is_strong = np.zeros(len(keywords), dtype=bool)
+        is_strong[[kw_id[kw] for kw in self.strong_keywords]] = True
+        is_evidence = np.zeros(len(keywords), dtype=bool)
+        is_evidence[[kw_id[kw] for kw in self.evidence_keywords]] = True
+
+        # 各テキストを1回だけ走査し、(行, 語彙) の一致ペアを集める
+        rows, ids = [], []
+        for row, text in enumerate(texts):
+            if not isinstance(text, str):
+                continue
+            for kw in self.index.hits(text):
+                rows.append(row)
+                ids.append(kw_id[kw])
+        rows = np.asarray(rows, dtype=np.int64)
+        ids = np.asarray(ids, dtype=np.int64)
+
+        # 行ごとの集約はすべて配列演算で行う
+        best_rank = np.full(n, no_topic, dtype=np.int32)
+        np.minimum.at(best_rank, rows, l1_rank[ids])
+        strong = np.zeros(n, dtype=bool)
+        np.logical_or.at(strong, rows, is_strong[ids])
+        evidence = np.zeros(n, dtype=bool)
+        np.logical_or.at(evidence, rows, is_evidence[ids])
+
+        topics = np.array(list(self.l1_mapping.values()) + [TOPIC_OTHER], dtype=object)
+        out["L1_Topic"] = topics[best_rank]
+        out["L2_Urgency"] = np.where(strong, URGENCY_HIGH, URGENCY_NORMAL)
+        out["L3_Actionability"] = np.where(evidence, EVIDENCE_PRESENT, EVIDENCE_ABSENT)
+        out["Has_Evidence"] = evidence
+
+        # L4: 判定表をブールマスクの組み合わせで表現
+        out["L4_Final_Status"] = np.select(
+            [strong & evidence, strong, evidence],
+            [LEVEL_4, LEVEL_3, LEVEL_2],
+            default=LEVEL_1,
+        )
+        return out
+
+    def predict_batch(self, records, text_column="voice"):
+        """
+        Classify many records at once. Accepts a DataFrame, a list of record
+        dicts or a list of texts, and returns a DataFrame with L1-L4 columns.
+        """
+        import pandas as pd
+
+        if isinstance(records, pd.DataFrame):
+            df = records
+        else:
+            records = list(records)
+            if records and isinstance(records[0], str):
+                df = pd.DataFrame({text_column: records})
+            else:
+                df = pd.DataFrame(records)
+            if text_column not in df:
+                df[text_column] = ""
+        return self.classify_frame(df, text_column=text_column)
+
+def classify_batches(batches, classifier=None):
+    """
+    Pipeline stage: classify an iterable of record batches (e.g. from
+    ingestion.loader.iter_batches) and yield the classified batches lazily.
+    """
+    classifier = classifier or CLODClassifier()
+    for batch in batches:
+        yield [classifier.predict(record) for record in batch]
+
 def run_test():
-    classifier = CLODClassifier()
-    results = []
-    
-    with open('../test_data.csv', mode='r', encoding='utf-8') as file:
-        reader = csv.DictReader(file)
-        for row in reader:
-            result = classifier.predict(row)
-            results.append(result)
+    from ingestion.loader import iter_batches
+
+    path = os.path.join(os.path.dirname(__file__), '..', 'test_data.csv')
             
     # Print results as a markdown table
     print("| ID | Original Voice | L1 (Topic) | L2 (Urgency) | L3 (Action) | L4 (Status) |")
     print("|---|---|---|---|---|---|")
-    for r in results:
-        print(f"| {r['id']} | {r['voice']} | {r['L1_Topic']} | {r['L2_Urgency']} | {r['L3_Actionability']} | {r['L4_Final_Status']} |")
+    for batch in classify_batches(iter_batches(path)):
+        for r in batch:
+            print(f"| {r['id']} | {r['voice']} | {r['L1_Topic']} | {r['L2_Urgency']} | {r['L3_Actionability']} | {r['L4_Final_Status']} |")
 
 if __name__ == "__main__":
     run_test()
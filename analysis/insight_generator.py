@@ -1,32 +1,68 @@
 import os
-from google import genai
-from google.genai import types
-from dotenv import load_dotenv
+import sys
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
-load_dotenv()
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-# Initialize API Key
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+from ingestion.disk_cache import DiskCache
+from ingestion.shared_cache import SingleFlight, register_namespace
+from ingestion import metrics
+from ingestion.settings import get_env
 
-try:
-    if GEMINI_API_KEY:
-        client = genai.Client(api_key=GEMINI_API_KEY)
-    else:
-        client = None
-except Exception as e:
-    print(f"Error initializing Gemini client: {e}")
-    client = None
+# Using gemini-2.5-flash for speed
+MODEL_NAME = 'gemini-2.5-flash'
+# プロンプトを変更したら上げる（キャッシュキーに含まれるため、古い要約は自動的に使われなくなる）
+PROMPT_VERSION = 1
 
-def generate_insight(speech_text, keyword, statistic_title):
+CACHE_DIR = os.path.join(os.path.dirname(__file__), '..', 'data', 'cache', 'insights')
+CACHE_MAX_BYTES = 128 * 1024 * 1024
+# 出力分のトークン見積もり（3〜4段落程度）
+ESTIMATED_OUTPUT_TOKENS = 1000
+
+_client = None
+_client_initialized = False
+_client_lock = threading.Lock()
+_cache = None
+# 同じ要約の同時生成（複数ユーザー・先読みとの重複）を1回の Gemini 呼び出しにまとめる
+_flights = SingleFlight()
+
+def get_client():
     """
-    Generates an empathetic, middle-school level summary and gap analysis 
-    comparing the speech text and the statistical context.
+    Return the Gemini client, creating it on first use (None when no API key is configured).
+    google.genai is imported here so that importing this module stays cheap.
     """
-    if not client:
-        return "⚠️ Gemini APIキーが設定されていないか、初期化に失敗しました。`.env` ファイルに正しい `GEMINI_API_KEY` を設定してください。"
+    global _client, _client_initialized
+    if not _client_initialized:
+        with _client_lock:
+            if not _client_initialized:
+                # Initialize API Key
+                api_key = get_env("GEMINI_API_KEY")
+                try:
+                    if api_key:
+                        from google import genai
+                        # GEMINI_BASE_URL で互換サーバー（scripts/standin_server.py など）に向けられる
+                        base_url = get_env("GEMINI_BASE_URL")
+                        http_options = genai.types.HttpOptions(base_url=base_url) if base_url else None
+                        _client = genai.Client(api_key=api_key, http_options=http_options)
+                except Exception as e:
+                    print(f"Error initializing Gemini client: {e}")
+                    _client = None
+                _client_initialized = True
+    return _client
 
-    try:
-        prompt = f"""
+def get_cache():
+    """Return the on-disk insight cache shared by all processes."""
+    global _cache
+    if _cache is None:
+        _cache = DiskCache(CACHE_DIR, ttl=None, max_bytes=CACHE_MAX_BYTES)
+    return _cache
+
+register_namespace("insights", get_cache)
+
+def build_prompt(speech_text, keyword, statistic_title):
+    return f"""
 あなたは中学生にも分かるような、とても優しくて分かりやすい言葉で政治とデータについて解説する「AIガイド」です。
 以下の「政治家の発言」と、現実の「関連する統計データ」を比較して、市民に向けた「やさしい要約」を作ってください。
 
@@ -41,12 +77,168 @@ def generate_insight(speech_text, keyword, statistic_title):
 2. **Reality Gap（言葉と現実のギャップ）**: 政治家はこう言っているけれど、実際の統計（{statistic_title}）の状況を考えると、何か矛盾や足りないことはあるか？
 3. **市民へのワンポイントアドバイス**: 最後に、私たち市民はこれから何に注目すればいいか？
 """
-        # Using gemini-2.5-flash for speed
-        response = client.models.generate_content(
-            model='gemini-2.5-flash',
-            contents=prompt,
-        )
+
+def insight_cache_key(speech_text, keyword, statistic_title):
+    """Content-addressed key: changes whenever the inputs, prompt version or model change."""
+    return DiskCache.make_key("insight", speech_text, keyword, statistic_title, PROMPT_VERSION, MODEL_NAME)
+
+def get_cached_insight(speech_text, keyword, statistic_title):
+    """Return the cached insight text, or None when it has not been generated yet."""
+    cached = get_cache().get(insight_cache_key(speech_text, keyword, statistic_title))
+    metrics.cache_result("insights", cached is not None)
+    return cached
+
+def generate_insight(speech_text, keyword, statistic_title, use_cache=True):
+    """
+    Generates an empathetic, middle-school level summary and gap analysis
+    comparing the speech text and the statistical context.
+    """
+    if use_cache:
+        cached = get_cached_insight(speech_text, keyword, statistic_title)
+        if cached is not None:
+            return cached
+
+    key = insight_cache_key(speech_text, keyword, statistic_title)
+    return _flights.do(key, lambda: _generate_insight(speech_text, keyword, statistic_title, key))
+
+def _generate_insight(speech_text, keyword, statistic_title, key):
+    client = get_client()
+    if not client:
+        return "⚠️ Gemini APIキーが設定されていないか、初期化に失敗しました。`.env` ファイルに正しい `GEMINI_API_KEY` を設定してください。"
+
+    try:
+        with metrics.span("gemini.generate"):
+            response = client.models.generate_content(
+                model=MODEL_NAME,
+                contents=build_prompt(speech_text, keyword, statistic_title),
+            )
+        # エラーメッセージはキャッシュせず、成功した要約だけを保存する
+        get_cache().set(key, response.text)
         return response.text
     except Exception as e:
+        metrics.upstream_error("gemini")
         print(f"Gemini API Error: {e}")
         return f"AIの要約生成中にエラーが発生しました。時間を置いて再度お試しください。({str(e)})"
+
+def stream_insight(speech_text, keyword, statistic_title):
+    """
+    Same as generate_insight(), but yields the answer chunk by chunk as Gemini streams it,
+    so the first tokens can be shown immediately. The full text is cached once complete.
+    """
+    cached = get_cached_insight(speech_text, keyword, statistic_title)
+    if cached is not None:
+        yield cached
+        return
+
+    client = get_client()
+    if not client:
+        yield "⚠️ Gemini APIキーが設定されていないか、初期化に失敗しました。`.env` ファイルに正しい `GEMINI_API_KEY` を設定してください。"
+        return
+
+    key = insight_cache_key(speech_text, keyword, statistic_title)
+    call, leader = _flights.begin(key)
+    if not leader:
+        # 同じ要約を別のセッション（または先読み）が生成中なら、その完成を待って表示する
+        try:
+            yield call.wait()
+        except Exception:
+            yield generate_insight(speech_text, keyword, statistic_title)
+        return
+
+    chunks = []
+    started = time.perf_counter()
+    try:
+        for chunk in client.models.generate_content_stream(
+            model=MODEL_NAME,
+            contents=build_prompt(speech_text, keyword, statistic_title),
+        ):
+            if chunk.text:
+                if not chunks and metrics.enabled():
+                    # 最初のトークンまでの時間（体感速度に直結する）
+                    metrics.observe("gemini.stream.first_token", time.perf_counter() - started)
+                chunks.append(chunk.text)
+                yield chunk.text
+    except Exception as e:
+        metrics.upstream_error("gemini")
+        if metrics.enabled():
+            metrics.observe("gemini.stream", time.perf_counter() - started, error=True)
+        print(f"Gemini API Error: {e}")
+        message = f"\n\nAIの要約生成中にエラーが発生しました。時間を置いて再度お試しください。({str(e)})"
+        _flights.finish(key, result="".join(chunks) + message)
+        yield message
+        return
+    except BaseException as e:
+        # 表示が途中で打ち切られた（再実行など）場合、待っている側は自分で生成し直す
+        _flights.finish(key, error=RuntimeError("insight stream was interrupted"))
+        raise
+
+    if metrics.enabled():
+        metrics.observe("gemini.stream", time.perf_counter() - started)
+    text = "".join(chunks)
+    if chunks:
+        get_cache().set(key, text)
+    _flights.finish(key, result=text)
+
+
+class TokenRateLimiter:
+    """Token bucket that refills `tokens_per_minute` tokens evenly over each minute."""
+
+    def __init__(self, tokens_per_minute):
+        self.capacity = tokens_per_minute
+        self.tokens = float(tokens_per_minute)
+        self.rate = tokens_per_minute / 60.0
+        self._lock = threading.Lock()
+        self._last = time.monotonic()
+
+    def acquire(self, tokens):
+        # 1リクエストがバケット容量を超える場合でも、満杯まで待てば通す
+        tokens = min(tokens, self.capacity)
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                wait_time = (tokens - self.tokens) / self.rate
+            time.sleep(wait_time)
+
+def estimate_tokens(speech_text, keyword, statistic_title):
+    # 日本語はおおよそ1文字1トークン以下なので、文字数で上限側に見積もる
+    return len(build_prompt(speech_text, keyword, statistic_title)) + ESTIMATED_OUTPUT_TOKENS
+
+def generate_insights_batch(items, max_workers=4, tokens_per_minute=250000):
+    """
+    Pre-generate insights for many (speech_text, keyword, statistic_title) tuples.
+    Already cached items are skipped; the rest run concurrently under a
+    token-per-minute limit. Returns {"cached": n, "generated": n, "failed": n}.
+    """
+    limiter = TokenRateLimiter(tokens_per_minute)
+    pending = []
+    seen = set()
+    for speech_text, keyword, statistic_title in items:
+        key = insight_cache_key(speech_text, keyword, statistic_title)
+        if key in seen:
+            continue
+        seen.add(key)
+        if get_cache().get(key) is None:
+            pending.append((speech_text, keyword, statistic_title))
+
+    stats = {"cached": len(seen) - len(pending), "generated": 0, "failed": 0}
+    if not pending:
+        return stats
+    if not get_client():
+        print("⚠️ GEMINI_API_KEY is not set. Skipping insight generation.")
+        stats["failed"] = len(pending)
+        return stats
+
+    def worker(item):
+        limiter.acquire(estimate_tokens(*item))
+        generate_insight(*item, use_cache=False)
+        return get_cached_insight(*item) is not None
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for ok in executor.map(worker, pending):
+            stats["generated" if ok else "failed"] += 1
+    return stats
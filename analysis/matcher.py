@@ -0,0 +1,74 @@
+import re
+
+
+def compile_alternation(keywords):
+    """Build a regex alternation matching any of keywords, longest first."""
+    ordered = sorted(dict.fromkeys(kw for kw in keywords if kw), key=len, reverse=True)
+    return "|".join(re.escape(kw) for kw in ordered)
+
+
+class KeywordIndex:
+    """
+    Precompiled multi-pattern index over a fixed keyword vocabulary.
+
+    All keywords are compiled into a single regex alternation (longest first),
+    so one C-level pass over the text finds every keyword occurrence. Keywords
+    that are prefixes of a longer keyword matched at the same position are
+    reported through a prefix table, which gives the same answer as an
+    Aho-Corasick automaton without a per-character Python loop.
+    """
+
+    def __init__(self, keywords):
+        # 重複を除きつつ、元の順序を保持する
+        self.keywords = list(dict.fromkeys(kw for kw in keywords if kw))
+        ordered = sorted(self.keywords, key=len, reverse=True)
+        self._pattern = re.compile(compile_alternation(ordered)) if ordered else None
+
+        # 長いキーワードの先頭に含まれる短いキーワード（同じ開始位置で見逃されるもの）
+        self._prefixes = {
+            kw: [other for other in ordered if other != kw and kw.startswith(other)]
+            for kw in ordered
+        }
+        # 他のキーワードを内包する、または末尾が他のキーワードの先頭と重なるキーワード。
+        # これらが現れない限り、重なりを考慮しない高速な走査で十分
+        self._overlapping = {
+            kw for kw in ordered
+            if any(
+                other != kw and (other in kw or any(other.startswith(kw[i:]) for i in range(1, len(kw))))
+                for other in ordered
+            )
+        }
+
+    def finditer(self, text):
+        """Yield (start, end, keyword) for every occurrence, ordered by start position."""
+        # 欠損値（None / NaN）は空の本文として扱う（predict_batch と同じ）
+        if not self._pattern or not text or not isinstance(text, str):
+            return
+        search = self._pattern.search
+        pos = 0
+        while True:
+            m = search(text, pos)
+            if m is None:
+                return
+            start, kw = m.start(), m.group()
+            yield start, m.end(), kw
+            for prefix in self._prefixes[kw]:
+                yield start, start + len(prefix), prefix
+            # 重なり合う一致を拾うため、次の探索は1文字先から始める
+            pos = start + 1
+
+    def find(self, text):
+        """Return {keyword: [start positions]} for the keywords present in text."""
+        positions = {}
+        for start, _, kw in self.finditer(text):
+            positions.setdefault(kw, []).append(start)
+        return positions
+
+    def hits(self, text):
+        """Return the set of keywords present in text."""
+        if not self._pattern or not text or not isinstance(text, str):
+            return set()
+        found = set(self._pattern.findall(text))
+        if found & self._overlapping:
+            return {kw for _, _, kw in self.finditer(text)}
+        return found
@@ -0,0 +1,169 @@
+import os
+import sys
+import sqlite3
+import argparse
+from collections import Counter
+from contextlib import contextmanager
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from ingestion.corpus_store import normalize_text
+from ingestion.shared_cache import SingleFlight
+from ingestion import metrics
+
+# 集計の軸。time は発言年
+DIMENSIONS = ("time", "speaker", "meeting")
+
+SCHEMA = """
+-- キーワードごとの L4 件数（軸 x 値 x L4 の事前集計）。ダッシュボードは行ではなくこの件数だけを読む
+CREATE TABLE IF NOT EXISTS overview_bins (
+    keyword   TEXT NOT NULL,
+    dimension TEXT NOT NULL,
+    bucket    TEXT NOT NULL,
+    l4        TEXT NOT NULL,
+    count     INTEGER NOT NULL,
+    PRIMARY KEY (keyword, dimension, bucket, l4)
+);
+
+-- どの発言（rowid）まで集計済みか。分類ルールが変わったら作り直す
+CREATE TABLE IF NOT EXISTS overview_state (
+    keyword    TEXT PRIMARY KEY,
+    last_rowid INTEGER NOT NULL,
+    ruleset    TEXT NOT NULL
+);
+"""
+
+_refresh_flights = SingleFlight()
+
+
+def bin_records(records):
+    """Counter of (dimension, bucket, L4 label) over classified records."""
+    counts = Counter()
+    for r in records:
+        l4 = r.get("L4_Final_Status") or ""
+        year = (r.get("date") or "")[:4]
+        counts["time", year if year.isdigit() else "不明", l4] += 1
+        counts["speaker", r.get("speaker") or "不明", l4] += 1
+        counts["meeting", r.get("meeting") or "不明", l4] += 1
+    return counts
+
+
+class OverviewIndex:
+    """
+    Pre-binned L4 counts per keyword over time, speaker and meeting, kept in the corpus
+    database. refresh() only classifies and bins the speeches stored since the last
+    refresh, so keeping the overview current costs O(new speeches), and reading it
+    costs O(bins) instead of O(matching speeches).
+    """
+
+    def __init__(self, corpus, results, classifier):
+        self.corpus = corpus
+        self.results = results
+        self.classifier = classifier
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.corpus.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def refresh(self, keyword, batch_size=5000):
+        """Fold speeches added since the last refresh into the bins. Returns the number binned."""
+        keyword = normalize_text(keyword)
+        key = (os.path.abspath(self.corpus.path), keyword)
+        with metrics.span("overview.refresh"):
+            return _refresh_flights.do(key, lambda: self._refresh(keyword, batch_size))
+
+    def _refresh(self, keyword, batch_size):
+        ruleset = self.classifier.ruleset_fingerprint()
+        with self._connect() as conn:
+            state = conn.execute(
+                "SELECT last_rowid, ruleset FROM overview_state WHERE keyword = ?", (keyword,)
+            ).fetchone()
+            if state is not None and state["ruleset"] != ruleset:
+                # ルールが変わると既存の件数は別のラベルで数えたものになるので、最初から数え直す
+                conn.execute("DELETE FROM overview_bins WHERE keyword = ?", (keyword,))
+                conn.execute("DELETE FROM overview_state WHERE keyword = ?", (keyword,))
+                state = None
+        last_rowid = state["last_rowid"] if state else 0
+
+        binned = 0
+        for batch_last_rowid, records in self.corpus.iter_matches(keyword, after_rowid=last_rowid, batch_size=batch_size):
+            classified, _ = self.results.classify(records, self.classifier)
+            counts = bin_records(classified)
+            with self._connect() as conn:
+                conn.execute("BEGIN IMMEDIATE")
+                current = conn.execute(
+                    "SELECT last_rowid FROM overview_state WHERE keyword = ?", (keyword,)
+                ).fetchone()
+                if (current["last_rowid"] if current else 0) != last_rowid:
+                    # 別プロセスが同じ範囲を先に集計した。二重に数えないよう手を引く
+                    return binned
+                conn.executemany(
+                    "INSERT INTO overview_bins (keyword, dimension, bucket, l4, count) VALUES (?, ?, ?, ?, ?) "
+                    "ON CONFLICT(keyword, dimension, bucket, l4) DO UPDATE SET count = count + excluded.count",
+                    [(keyword, dim, bucket, l4, n) for (dim, bucket, l4), n in counts.items()],
+                )
+                conn.execute(
+                    "INSERT INTO overview_state (keyword, last_rowid, ruleset) VALUES (?, ?, ?) "
+                    "ON CONFLICT(keyword) DO UPDATE SET last_rowid = excluded.last_rowid, ruleset = excluded.ruleset",
+                    (keyword, batch_last_rowid, ruleset),
+                )
+            last_rowid = batch_last_rowid
+            binned += len(records)
+        return binned
+
+    def counts(self, keyword, dimension, top=None):
+        """
+        DataFrame (bucket, l4, count) for one dimension. With top, only the `top` buckets
+        with the most speeches are returned (for speaker / meeting).
+        """
+        import pandas as pd
+
+        if dimension not in DIMENSIONS:
+            raise ValueError(f"Unknown dimension: {dimension}")
+        keyword = normalize_text(keyword)
+        query = "SELECT bucket, l4, count FROM overview_bins WHERE keyword = ? AND dimension = ?"
+        params = [keyword, dimension]
+        if top:
+            query += (" AND bucket IN (SELECT bucket FROM overview_bins WHERE keyword = ? AND dimension = ? "
+                      "GROUP BY bucket ORDER BY SUM(count) DESC, bucket LIMIT ?)")
+            params += [keyword, dimension, top]
+        with self._connect() as conn:
+            rows = conn.execute(query + " ORDER BY bucket, l4", params).fetchall()
+        return pd.DataFrame([dict(row) for row in rows], columns=["bucket", "l4", "count"])
+
+    def total(self, keyword):
+        """Number of speeches binned for keyword."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT SUM(count) FROM overview_bins WHERE keyword = ? AND dimension = 'time'",
+                (normalize_text(keyword),),
+            ).fetchone()
+            return row[0] or 0
+
+
+if __name__ == "__main__":
+    from ingestion.corpus_store import CorpusStore
+    from analysis.classifier import CLODClassifier
+    from analysis.result_store import ResultStore
+
+    parser = argparse.ArgumentParser(description="Pre-binned L4 overview of the local corpus.")
+    parser.add_argument("keywords", nargs="+")
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    index = OverviewIndex(CorpusStore(), ResultStore(), CLODClassifier())
+    for kw in args.keywords:
+        added = index.refresh(kw)
+        print(f"\n「{kw}」: {index.total(kw):,} speeches ({added:,} newly binned)")
+        for dim in DIMENSIONS:
+            frame = index.counts(kw, dim, top=args.top)
+            if not frame.empty:
+                print(frame.pivot_table(index="bucket", columns="l4", values="count", fill_value=0))
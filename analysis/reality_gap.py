@@ -0,0 +1,165 @@
+import numpy as np
+
+# 発言年の前後何年を傾きの計算に使うか
+DEFAULT_WINDOW = 3
+# 変化率を測る期間（年）
+DEFAULT_HORIZON = 3
+# 強いコミットメント（L2）がない発言のギャップは割り引く
+WEAK_COMMITMENT_WEIGHT = 0.5
+
+GAP_COLUMNS = (
+    "speech_year", "slope_before", "slope_after", "slope_change",
+    "pct_change", "pct_change_before", "direction_agreement", "gap_score",
+)
+
+
+def speech_years(dates):
+    """Parse 'YYYY-MM-DD' strings into a float array of years (NaN when missing)."""
+    years = np.full(len(dates), np.nan)
+    for i, date in enumerate(dates):
+        head = (date or "")[:4]
+        if head.isdigit():
+            years[i] = int(head)
+    return years
+
+
+def series_arrays(series):
+    """[{"year": "2018", "value": ...}, ...] -> (years, values) sorted by year, NaN values dropped."""
+    points = sorted(
+        (int(p["year"]), float(p["value"]))
+        for p in series
+        if str(p.get("year", ""))[:4].isdigit() and p.get("value") is not None
+    )
+    years = np.array([y for y, _ in points], dtype=float)
+    values = np.array([v for _, v in points], dtype=float)
+    valid = ~np.isnan(values)
+    return years[valid], values[valid]
+
+
+def _masked_relative_slope(x, values, mask):
+    """
+    Least-squares slope of values over x for each row of mask (speeches x years),
+    expressed as % of the window mean per year. NaN when fewer than 2 points.
+    """
+    m = mask.astype(float)
+    count = m.sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        x_mean = (m * x).sum(axis=1) / count
+        v_mean = (m * values).sum(axis=1) / count
+        dx = x[None, :] - x_mean[:, None]
+        num = (m * dx * (values[None, :] - v_mean[:, None])).sum(axis=1)
+        den = (m * dx ** 2).sum(axis=1)
+        slope = num / den / np.abs(v_mean) * 100
+    slope[(count < 2) | (den == 0)] = np.nan
+    return slope
+
+
+def _value_at(years, values, targets):
+    """Linear interpolation of the series at target years; NaN outside the observed range."""
+    out = np.interp(targets, years, values) if len(years) else np.full(len(targets), np.nan)
+    out = np.asarray(out, dtype=float)
+    if len(years):
+        out[(targets < years[0]) | (targets > years[-1])] = np.nan
+    out[np.isnan(targets)] = np.nan
+    return out
+
+
+def compute_gap_metrics(years_of_speech, series, window=DEFAULT_WINDOW, horizon=DEFAULT_HORIZON,
+                        desired_direction=1, commitment=None):
+    """
+    Reality Gap metrics for N speeches against one yearly series, computed on a
+    (speeches x years) matrix without per-speech loops.
+
+    - slope_before / slope_after: trend (% per year) in [year - window, year] and [year, year + window]
+    - slope_change: slope_after - slope_before
+    - pct_change: % change from the speech year to year + horizon
+    - pct_change_before: % change over the horizon ending at the speech year (or the latest
+      observed year when the series stops earlier), i.e. the reality the speaker was facing
+    - direction_agreement: +1 when the series moved in the promised direction after the
+      speech, -1 when it moved the other way, 0 when flat (from pct_change, or slope_after
+      when the horizon year is not observed yet), NaN without post-speech data
+    - gap_score: how far reality ran against the promised direction after the speech
+      (higher = larger gap), from pct_change and discounted for speeches without a strong
+      commitment; NaN without post-speech data (pct_change_before is context, not a gap)
+
+    desired_direction is +1 when the policy goal is for the series to rise, -1 to fall.
+    commitment is an optional boolean array (L2 strong commitment per speech).
+    Returns {column: ndarray} with the keys in GAP_COLUMNS.
+    """
+    s = np.asarray(years_of_speech, dtype=float)
+    years, values = series_arrays(series)
+    n = len(s)
+
+    if len(years) == 0:
+        empty = np.full(n, np.nan)
+        return {"speech_year": s, **{col: empty.copy() for col in GAP_COLUMNS[1:]}}
+
+    delta = years[None, :] - s[:, None]
+    before = (delta >= -window) & (delta <= 0)
+    after = (delta >= 0) & (delta <= window)
+    slope_before = _masked_relative_slope(years, values, before)
+    slope_after = _masked_relative_slope(years, values, after)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        start = _value_at(years, values, s)
+        pct_change = (_value_at(years, values, s + horizon) - start) / np.abs(start) * 100
+
+        anchor = np.minimum(s, years[-1])
+        anchor_value = _value_at(years, values, anchor)
+        pct_change_before = (anchor_value - _value_at(years, values, anchor - horizon)) / np.abs(
+            _value_at(years, values, anchor - horizon)) * 100
+
+    # 発言の horizon 年後がまだ観測されていない場合は、発言後の窓のトレンド（slope_after）で向きを判定する。
+    # 発言後のデータが1点もなければ slope_after も NaN なので、判定も NaN のまま
+    moved = np.where(np.isnan(pct_change), slope_after, pct_change)
+    direction_agreement = np.sign(moved) * desired_direction
+
+    # ギャップは発言後の変化だけで測る（発言前の変化で埋めると、同じ統計の全発言が同じ値になる）
+    weight = np.ones(n) if commitment is None else np.where(np.asarray(commitment, dtype=bool), 1.0, WEAK_COMMITMENT_WEIGHT)
+    gap_score = -desired_direction * pct_change * weight
+
+    return {
+        "speech_year": s,
+        "slope_before": slope_before,
+        "slope_after": slope_after,
+        "slope_change": slope_after - slope_before,
+        "pct_change": pct_change,
+        "pct_change_before": pct_change_before,
+        "direction_agreement": direction_agreement,
+        "gap_score": gap_score,
+    }
+
+
+def gap_frame(records, stats_info, commitment=None, window=DEFAULT_WINDOW, horizon=DEFAULT_HORIZON):
+    """
+    DataFrame of gap metrics (one row per record, same order) for records with a 'date'
+    and the dashboard's stats dict ({"data": [...], "desired_direction": ...}).
+    """
+    import pandas as pd
+
+    metrics = compute_gap_metrics(
+        speech_years([r.get("date") for r in records]),
+        stats_info.get("data", []),
+        window=window,
+        horizon=horizon,
+        desired_direction=stats_info.get("desired_direction", 1),
+        commitment=commitment,
+    )
+    return pd.DataFrame(metrics)
+
+
+if __name__ == "__main__":
+    import time
+
+    births = [
+        {"year": str(y), "value": v}
+        for y, v in zip(range(2015, 2024), [1005721, 977242, 946146, 918400, 865239, 840835, 811622, 770759, 758631])
+    ]
+    print(gap_frame([{"date": "2017-06-01"}, {"date": "2020-01-15"}, {"date": "2025-03-01"}],
+                    {"data": births, "desired_direction": 1}, commitment=[True, False, True]).round(2))
+
+    rng = np.random.default_rng(0)
+    years = rng.integers(2010, 2026, size=100000).astype(float)
+    start = time.perf_counter()
+    compute_gap_metrics(years, births)
+    print(f"\n100,000 speeches: {(time.perf_counter() - start) * 1000:.0f} ms")
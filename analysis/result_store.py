@@ -0,0 +1,215 @@
+import os
+import sys
+import json
+import sqlite3
+import hashlib
+import argparse
+from contextlib import contextmanager
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from analysis.matcher import KeywordIndex
+from ingestion import metrics
+from ingestion.settings import get_env
+
+DEFAULT_DB_PATH = os.path.join(os.path.dirname(__file__), '..', 'data', 'classifications.sqlite3')
+
+# SQLite の変数上限に収まるよう、IN 句の ID 数を抑える
+LOOKUP_CHUNK = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS classifications (
+    speech_id TEXT PRIMARY KEY,
+    text_hash TEXT NOT NULL,
+    vocab_id  TEXT NOT NULL,
+    ruleset   TEXT NOT NULL,
+    hits      TEXT NOT NULL,
+    labels    TEXT NOT NULL
+);
+
+-- hits を計算したときの語彙。語彙が変わったら、追加された語だけを再走査するのに使う
+CREATE TABLE IF NOT EXISTS vocabularies (
+    vocab_id TEXT PRIMARY KEY,
+    terms    TEXT NOT NULL
+);
+"""
+
+
+def text_hash(text):
+    return hashlib.sha1((text or "").encode("utf-8")).hexdigest()
+
+
+class ResultStore:
+    """
+    Persistent L1-L4 classification results keyed by speech ID.
+
+    Each row keeps the keyword hits of the speech together with the vocabulary they
+    were computed against and the ruleset fingerprint of the labels. On a re-run:
+      - unchanged speech, same ruleset     -> stored labels are reused
+      - unchanged speech, same vocabulary  -> labels are recomputed from the stored hits
+      - unchanged speech, vocabulary edit  -> only the newly added terms are scanned
+      - new or edited speech               -> full scan
+    """
+
+    def __init__(self, path=None):
+        self.path = path or get_env("CLOD_RESULTS_DB", DEFAULT_DB_PATH)
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._added_indexes = {}
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        # 接続は操作ごとに開く（Streamlit の複数スレッドから安全に使うため）
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _lookup(self, conn, speech_ids):
+        rows = {}
+        for i in range(0, len(speech_ids), LOOKUP_CHUNK):
+            chunk = speech_ids[i:i + LOOKUP_CHUNK]
+            placeholders = ",".join("?" * len(chunk))
+            cursor = conn.execute(
+                f"SELECT * FROM classifications WHERE speech_id IN ({placeholders})", chunk
+            )
+            rows.update((row["speech_id"], row) for row in cursor)
+        return rows
+
+    def _added_terms_index(self, conn, old_vocab_id, vocabulary):
+        """KeywordIndex over the terms that the current vocabulary adds to an older one."""
+        key = (old_vocab_id, tuple(vocabulary))
+        if key not in self._added_indexes:
+            row = conn.execute("SELECT terms FROM vocabularies WHERE vocab_id = ?", (old_vocab_id,)).fetchone()
+            old_terms = set(json.loads(row["terms"])) if row else set()
+            # 旧語彙が不明な場合は全語彙で走査し直す
+            self._added_indexes[key] = (
+                old_terms if row else None,
+                KeywordIndex([kw for kw in vocabulary if kw not in old_terms]),
+            )
+        return self._added_indexes[key]
+
+    def classify(self, records, classifier, text_field="voice"):
+        """
+        Classify records, reusing stored results where possible and persisting the rest.
+        Returns (results, stats): results are predict()-shaped dicts in input order and
+        stats counts {"reused", "relabelled", "rescanned", "classified"}.
+        """
+        records = list(records)
+        vocabulary = classifier.vocabulary()
+        vocab_id = classifier.vocabulary_fingerprint()
+        ruleset = classifier.ruleset_fingerprint()
+        current_terms = set(vocabulary)
+        stats = {"reused": 0, "relabelled": 0, "rescanned": 0, "classified": 0}
+        results, updates = [], []
+
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR IGNORE INTO vocabularies (vocab_id, terms) VALUES (?, ?)",
+                (vocab_id, json.dumps(vocabulary, ensure_ascii=False)),
+            )
+            ids = [str(r["id"]) for r in records if r.get("id")]
+            stored = self._lookup(conn, ids)
+
+            for record in records:
+                text = record.get(text_field, "") or ""
+                speech_id = str(record["id"]) if record.get("id") else None
+                digest = text_hash(text)
+                row = stored.get(speech_id)
+
+                if row is not None and row["text_hash"] == digest:
+                    if row["ruleset"] == ruleset:
+                        labels = json.loads(row["labels"])
+                        stats["reused"] += 1
+                        metrics.cache_result("classifications", True)
+                        results.append({**record, **labels})
+                        continue
+                    hits = set(json.loads(row["hits"]))
+                    if row["vocab_id"] == vocab_id:
+                        stats["relabelled"] += 1
+                    else:
+                        old_terms, added_index = self._added_terms_index(conn, row["vocab_id"], vocabulary)
+                        if old_terms is None:
+                            hits = classifier.scan(text)
+                            stats["classified"] += 1
+                        elif added_index.keywords:
+                            # 削除された語の一致は捨て、追加された語だけを本文から探す
+                            hits = (hits & current_terms) | added_index.hits(text)
+                            stats["rescanned"] += 1
+                        else:
+                            hits &= current_terms
+                            stats["relabelled"] += 1
+                else:
+                    hits = classifier.scan(text)
+                    stats["classified"] += 1
+
+                metrics.cache_result("classifications", False)
+                labels = classifier.labels_from_hits(hits)
+                results.append({**record, **labels})
+                if speech_id:
+                    updates.append((
+                        speech_id, digest, vocab_id, ruleset,
+                        json.dumps(sorted(hits), ensure_ascii=False),
+                        json.dumps(labels, ensure_ascii=False),
+                    ))
+
+            if updates:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO classifications "
+                    "(speech_id, text_hash, vocab_id, ruleset, hits, labels) VALUES (?, ?, ?, ?, ?, ?)",
+                    updates,
+                )
+        return results, stats
+
+    def get(self, speech_id):
+        """Return the stored labels for a speech ID, or None."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT labels FROM classifications WHERE speech_id = ?", (str(speech_id),)
+            ).fetchone()
+            return json.loads(row["labels"]) if row else None
+
+    def get_many(self, speech_ids):
+        """Return {speech ID: labels} for the stored speeches among speech_ids."""
+        ids = [str(i) for i in speech_ids]
+        with self._connect() as conn:
+            return {speech_id: json.loads(row["labels"]) for speech_id, row in self._lookup(conn, ids).items()}
+
+    def count(self):
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM classifications").fetchone()[0]
+
+
+def classify_corpus_store(corpus, results=None, classifier=None, batch_size=5000):
+    """
+    Incrementally classify every speech in a CorpusStore. Only new, edited or
+    vocabulary-affected speeches are scanned. Returns the summed stats.
+    """
+    from analysis.classifier import CLODClassifier
+
+    results = results or ResultStore()
+    classifier = classifier or CLODClassifier()
+    totals = {"reused": 0, "relabelled": 0, "rescanned": 0, "classified": 0}
+    for batch in corpus.iter_batches(batch_size):
+        _, stats = results.classify(batch, classifier)
+        for key, value in stats.items():
+            totals[key] += value
+    return totals
+
+
+if __name__ == "__main__":
+    from ingestion.corpus_store import CorpusStore
+
+    parser = argparse.ArgumentParser(description="Incrementally classify the local corpus (L1-L4).")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    args = parser.parse_args()
+
+    totals = classify_corpus_store(CorpusStore(), batch_size=args.batch_size)
+    print(f"Reused {totals['reused']}, relabelled {totals['relabelled']}, "
+          f"rescanned {totals['rescanned']}, classified {totals['classified']} speeches.")
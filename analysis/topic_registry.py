@@ -0,0 +1,104 @@
+import os
+import sys
+import json
+from functools import lru_cache
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from analysis.matcher import KeywordIndex
+
+REGISTRY_PATH = os.path.join(os.path.dirname(__file__), '..', 'data', 'topic_registry.json')
+
+
+class TopicRegistry:
+    """
+    Declarative mapping of policy topics to their vocabulary and e-Stat series.
+
+    The registry is compiled once into an inverted index (term -> topic/series),
+    so resolving a keyword is a lookup instead of a chain of substring checks.
+    The same topic vocabulary feeds CLODClassifier.l1_mapping.
+    """
+
+    def __init__(self, registry):
+        self.topics = registry["topics"]
+        self.series = registry["series"]
+        self.default_series = registry["default_series"]
+
+        # 語彙 -> トピック（登録順に最初の定義を優先）
+        self.term_topics = {}
+        # 語彙 -> 統計系列 ID のリスト（転置インデックス）
+        self.term_series = {}
+        for topic in self.topics:
+            for term in topic["terms"]:
+                self.term_topics.setdefault(term, topic["name"])
+                series_ids = self.term_series.setdefault(term, [])
+                series_ids.extend(sid for sid in topic["series"] if sid not in series_ids)
+
+        # 登録順を保つため、系列の並び順も控えておく
+        self._series_order = {sid: i for i, sid in enumerate(self.series)}
+        self._index = KeywordIndex(list(self.term_topics))
+
+    def l1_mapping(self):
+        """Return {term: topic name} in registry order, as used by CLODClassifier."""
+        return dict(self.term_topics)
+
+    def dataset_info(self, series_id):
+        """Return the dashboard's dataset dict for a series, with its bundled fallback data."""
+        entry = self.series[series_id]
+        return {
+            "title": entry["title"],
+            "y_label": entry["y_label"],
+            "unit": entry.get("unit", ""),
+            # 政策目標として望ましい変化の向き（+1: 増加、-1: 減少）。Reality Gap の符号に使う
+            "desired_direction": entry.get("desired_direction", 1),
+            "statsDataId": series_id,
+            "data": [dict(point) for point in entry.get("fallback", [])],
+        }
+
+    def resolve(self, keyword):
+        """
+        Return ranked candidate series for a keyword:
+        [{"statsDataId", "title", "score", "terms"}, ...], best match first.
+        Longer (more specific) matched terms weigh more; ties keep registry order.
+        Falls back to the default series when nothing matches.
+        """
+        if keyword in self.term_series:
+            matched = {keyword}
+        else:
+            matched = self._index.hits(keyword)
+
+        scores = {}
+        terms = {}
+        for term in matched:
+            for sid in self.term_series.get(term, []):
+                scores[sid] = scores.get(sid, 0) + len(term)
+                terms.setdefault(sid, []).append(term)
+
+        if not scores:
+            scores = {self.default_series: 0}
+            terms = {self.default_series: []}
+
+        ranked = sorted(scores, key=lambda sid: (-scores[sid], self._series_order.get(sid, 0)))
+        return [
+            {
+                "statsDataId": sid,
+                "title": self.series[sid]["title"],
+                "score": scores[sid],
+                "terms": sorted(terms[sid]),
+            }
+            for sid in ranked
+        ]
+
+
+@lru_cache(maxsize=None)
+def load_registry(path=REGISTRY_PATH):
+    """Load and compile the topic registry once per process."""
+    with open(path, 'r', encoding='utf-8') as f:
+        return TopicRegistry(json.load(f))
+
+
+if __name__ == "__main__":
+    registry = load_registry()
+    for kw in ["少子化", "防衛費増額", "DX推進", "経済対策と子ども", "教育"]:
+        candidates = registry.resolve(kw)
+        print(f"{kw}: " + ", ".join(f"{c['title']} ({c['score']})" for c in candidates))
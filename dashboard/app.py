@@ -4,27 +4,84 @@ import altair as alt
 import sys
 import os
 import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from ingestion.api_client import fetch_diet_records
-from ingestion.estat_client import fetch_stats_for_keyword
-from analysis.classifier import CLODClassifier
-from analysis.insight_generator import generate_insight
+from ingestion.corpus_store import CorpusStore, sync_keyword
+from ingestion.estat_client import fetch_stats_for_keyword, invalidate_stats
+from ingestion.starter_pack import StarterPack, LEGACY_PACK_PATH
+from ingestion.records import SpeechTable
+from ingestion.dedup import group_by_cluster
+from ingestion import metrics
+from ingestion.settings import get_env
+from analysis.classifier import CLODClassifier, URGENCY_HIGH, LEVEL_1, LEVEL_2, LEVEL_3, LEVEL_4
+from analysis.overview import OverviewIndex
+from analysis.reality_gap import gap_frame
+from analysis.result_store import ResultStore
+from analysis.insight_generator import generate_insight, get_cached_insight, stream_insight
 
 st.set_page_config(page_title="C-LOD リアル分析", layout="wide", page_icon="🏛️")
 
-@st.cache_data
+@st.cache_resource
 def load_starter_pack():
-    path = os.path.join(os.path.dirname(__file__), '..', 'data', 'starter_pack.json')
-    if os.path.exists(path):
-        with open(path, 'r', encoding='utf-8') as f:
+    # コンパクト版パック（data/starter_pack/）はマニフェストだけを読み、キーワードごとに遅延読み込みする
+    if StarterPack.exists():
+        return StarterPack()
+    return None
+
+@st.cache_data
+def load_legacy_starter_pack():
+    if os.path.exists(LEGACY_PACK_PATH):
+        with open(LEGACY_PACK_PATH, 'r', encoding='utf-8') as f:
             return json.load(f)
     return {}
 
-@st.cache_data(show_spinner=False)
-def fetch_insight(speech_text, keyword, title):
-    return generate_insight(speech_text, keyword, title)
+@st.cache_resource
+def get_corpus_store():
+    return CorpusStore()
+
+@st.cache_resource
+def get_classifier():
+    # キーワード索引の構築は1回だけ（全セッションで共有）
+    return CLODClassifier()
+
+@st.cache_resource
+def get_result_store():
+    return ResultStore()
+
+@st.cache_resource
+def get_overview_index():
+    return OverviewIndex(get_corpus_store(), get_result_store(), get_classifier())
+
+@st.cache_resource
+def get_background_executor():
+    # プロセス全体で共有するバックグラウンドワーカー（e-Stat と AI 要約の先読み用）
+    return ThreadPoolExecutor(max_workers=4, thread_name_prefix="clod-prefetch")
+
+@st.cache_resource
+def get_inflight_prefetches():
+    return set(), threading.Lock()
+
+def prefetch_analysis(keyword, records, top_n):
+    """Warm the e-Stat and insight disk caches for the top-N listed speeches in the background."""
+    executor = get_background_executor()
+    inflight, lock = get_inflight_prefetches()
+
+    def warm(voice):
+        stats_info = fetch_stats_for_keyword(keyword)
+        generate_insight(voice, keyword, stats_info.get('title', '関連統計'))
+
+    for record in records[:top_n]:
+        key = (keyword, record.get('id') or record['voice'])
+        with lock:
+            # 同じ発言の先読みが実行中なら重ねて投入しない
+            if key in inflight:
+                continue
+            inflight.add(key)
+        future = executor.submit(warm, record['voice'])
+        future.add_done_callback(lambda _, key=key: inflight.discard(key))
 
 def render_depth_gauge(score_text):
     if "Level 4" in score_text:
@@ -45,10 +102,6 @@ def render_depth_gauge(score_text):
     """
     st.markdown(html, unsafe_allow_html=True)
 
-@st.cache_data(show_spinner=False)
-def fetch_insight(speech_text, keyword, title):
-    return generate_insight(speech_text, keyword, title)
-
 def main():
     st.warning("**Current Version:** 1.2 Insight Fix 🚀")
     st.title("🏛️ C-LOD: Policy vs. Reality (Gap Analysis) 🇯🇵")
@@ -56,63 +109,145 @@ def main():
 
     # サイドバー：データソースと検索設定
     st.sidebar.header("⚙️ Data Source")
-    data_mode = st.sidebar.radio("データソースを選択", ["Starter Pack (Demo)", "Live API Search (国会図書館)"])
-    
-    starter_data = load_starter_pack()
+    data_mode = st.sidebar.radio("データソースを選択", ["Starter Pack (Demo)", "Corpus Search (国会会議録)", "Overview (概観)"])
+    if data_mode == "Overview (概観)":
+        render_overview()
+        return
     
     keyword = "少子化"
     raw_records = []
+    # スターターパックのセグメント（分類結果・統計・要約が計算済み）
+    segment = None
+    # コーパスモードの近似重複クラスタ（発言ごとのクラスタ ID と件数）
+    cluster_ids = None
+    cluster_sizes = None
     
     if data_mode == "Starter Pack (Demo)":
         st.sidebar.info("デモモード：保存済みのデータを高速表示します（APIキー不要）。")
-        if starter_data:
+        starter_pack = load_starter_pack()
+        starter_data = {} if starter_pack else load_legacy_starter_pack()
+        if starter_pack:
+            keyword = st.sidebar.selectbox("キーワード", starter_pack.keywords())
+            segment = starter_pack.segment(keyword)
+            raw_records = segment.metadata()
+        elif starter_data:
             keyword = st.sidebar.selectbox("キーワード", list(starter_data.keys()))
             raw_records = starter_data[keyword]
         else:
             st.sidebar.error("Starter Packが見つかりません。")
     else:
-        st.sidebar.warning("ライブモード：リアルタイムで国会APIをスキャンします。")
+        st.sidebar.warning("コーパスモード：ローカルに蓄積した国会発言を検索します。国会APIは同期時のみ使用します。")
+        store = get_corpus_store()
         keyword = st.sidebar.text_input("検索キーワード", value="少子化")
-        limit = st.sidebar.slider("取得件数", min_value=1, max_value=30, value=5)
+        limit = st.sidebar.slider("表示件数", min_value=1, max_value=30, value=5)
         
-        # 開発用のキャッシュクリアボタン（強制リロード用）
-        if st.sidebar.button("🔄 キャッシュをクリアして再取得", type="primary"):
-            st.cache_data.clear()
+        # このキーワードの統計キャッシュだけを破棄する（他のユーザーの要約やスターターパックには影響しない）
+        if st.sidebar.button("🔄 このキーワードの統計を再取得", type="primary"):
+            invalidate_stats(keyword)
             
-        if st.sidebar.button("🔍 ライブ検索実行", type="primary"):
-            st.cache_data.clear()
-            with st.spinner(f"「{keyword}」に関する国会発言を取得中... ⏳"):
+        last_synced = store.last_synced_date(keyword)
+        st.sidebar.caption(f"最終同期: {last_synced or '未同期'} / 蓄積件数: {store.count():,} 件")
+        gap = store.sync_gap(keyword)
+        if gap:
+            st.sidebar.caption(f"⚠️ 件数上限で打ち切ったため {gap['until_date']} 以前の発言が未取得です。再度同期すると続きを取得します。")
+        sync_limit = st.sidebar.number_input("同期する最大件数", min_value=10, max_value=5000, value=100, step=10)
+        if st.sidebar.button("📥 国会APIと同期", type="primary"):
+            with st.spinner(f"「{keyword}」の新しい国会発言を同期中... ⏳"):
                 try:
-                    raw_records = fetch_diet_records(keyword=keyword, max_records=limit)
-                    st.session_state['live_records'] = raw_records
-                    st.success(f"📺 デバッグ: `{keyword}` のデータを {len(raw_records)} 件取得しました！")
+                    added = sync_keyword(store, keyword, max_records=int(sync_limit))
+                    st.success(f"`{keyword}` の新しい発言を {added} 件追加しました。")
                 except Exception as e:
                     st.error(f"国会会議録APIリクエストエラー: {e}")
                     
-        # Button pressed logic memory
-        if 'live_records' in st.session_state:
-            raw_records = st.session_state['live_records']
+        # ローカルの全文索引を検索（ミリ秒単位・オフラインでも動作）
+        # 本文は共有バッファに1回だけ格納し、各行はそこへのビューとして扱う
+        raw_records = SpeechTable.from_records(store.search(keyword, limit=limit))
+        clusters = store.cluster_info([r['id'] for r in raw_records])
+        cluster_ids = [clusters.get(r['id'], {}).get('cluster_id', r['id']) for r in raw_records]
+        cluster_sizes = [clusters.get(r['id'], {}).get('cluster_size', 1) for r in raw_records]
 
-    if not raw_records and data_mode == "Live API Search (国会図書館)":
-        st.info("👈 サイドバーから「ライブ検索実行」をクリックしてデータを取得してください。")
+    if not raw_records and data_mode == "Corpus Search (国会会議録)":
+        st.info("👈 該当する発言がローカルコーパスにありません。サイドバーの「国会APIと同期」で取得してください。")
         return
     elif not raw_records:
         st.warning("データがありません。")
         return
 
+    # 分類と AI 要約に使う発言。近似重複はクラスタの代表発言で1回だけ計算して使い回す
+    analysis_records = list(raw_records) if segment is None else None
+    if cluster_ids is not None:
+        representatives = {r['id']: r for r in get_corpus_store().get_records(cluster_ids)}
+        analysis_records = [representatives.get(cid, r) for cid, r in zip(cluster_ids, raw_records)]
+
+    stats_future = None
+    if segment is None:
+        prefetch_n = st.sidebar.slider("AI要約を先読みする発言数", min_value=0, max_value=10, value=3)
+        # ユーザーがリストを見ている間に、上位の発言の統計と要約をバックグラウンドで準備する
+        unique_records = list({r['id']: r for r in analysis_records}.values()) if cluster_ids else analysis_records
+        prefetch_analysis(keyword, unique_records, prefetch_n)
+    if segment is None or not segment.stats:
+        # 選択中の発言用の統計取得も先に開始し、L1-L4 分析と並行して進める
+        stats_future = get_background_executor().submit(fetch_stats_for_keyword, keyword)
+
+    # L1-L4 分類（スターターパックは計算済み、コーパスは保存済みの結果を再利用）
+    classified = None
+    if segment is not None and starter_pack.ruleset(keyword) == get_classifier().ruleset_fingerprint():
+        layer_labels = [segment.labels(i) or {} for i in range(len(segment))]
+    elif segment is not None:
+        # パック作成後に分類ルールが変わっている。同梱のラベルは古いので分類し直す（数十件なので即時）
+        classified = [get_classifier().predict(segment.record(i)) for i in range(len(segment))]
+        layer_labels = classified
+    elif cluster_ids is not None:
+        representatives_idx, inverse = group_by_cluster(cluster_ids)
+        rep_results, _ = get_result_store().classify(
+            [analysis_records[i] for i in representatives_idx], get_classifier())
+        # ラベルは表の列に入れる（本文を行ごとの dict に展開しない）
+        classified = raw_records.assign_labels([rep_results[inverse[i]] for i in range(len(raw_records))])
+        layer_labels = classified
+    else:
+        classified, _ = get_result_store().classify(raw_records, get_classifier())
+        layer_labels = classified
+    commitment = [labels.get('L2_Urgency') == URGENCY_HIGH for labels in layer_labels]
+
+    if stats_future is None:
+        stats_info = segment.stats
+    else:
+        with st.spinner("e-Statデータを取得中... ⏳"):
+            stats_info = stats_future.result()
+
+    # 全発言の Reality Gap をまとめて計算（発言数 x 年 の行列演算）
+    with metrics.span("dashboard.reality_gap"):
+        gaps = gap_frame(raw_records, stats_info, commitment=commitment)
+
     # Metadata-First Search UI
     st.subheader(f"🗣️ 「{keyword}」に関する国会発言リスト")
+    sort_order = st.radio("並び順", ["発言日順", "Reality Gap が大きい順"], horizontal=True)
     
     # Extract metadata for the table (excluding full voice text to keep it snappy)
-    meta_df = pd.DataFrame(raw_records)[["date", "speaker", "meeting"]]
+    if isinstance(raw_records, SpeechTable):
+        meta_df = raw_records.metadata_frame(["date", "speaker", "meeting"])
+    else:
+        meta_df = pd.DataFrame(raw_records)[["date", "speaker", "meeting"]]
+    meta_df["gap_score"] = gaps["gap_score"].round(1)
+    # 発言前の変化は参考情報として別の列に出す（並び替えと Reality Gap には使わない）
+    meta_df["pct_change_before"] = gaps["pct_change_before"].round(1)
+    meta_df["direction_agreement"] = gaps["direction_agreement"].map({1.0: "✅ 一致", -1.0: "❌ 逆行", 0.0: "➖ 横ばい"})
+    if cluster_sizes is not None:
+        meta_df["cluster_size"] = cluster_sizes
     meta_df.index = meta_df.index + 1 # 1-indexed for display
+    if sort_order != "発言日順":
+        meta_df = meta_df.sort_values("gap_score", ascending=False, na_position="last", kind="stable")
     
     st.dataframe(
         meta_df,
         column_config={
             "date": "発言日",
             "speaker": "発言者",
-            "meeting": "会議名"
+            "meeting": "会議名",
+            "gap_score": st.column_config.NumberColumn("Reality Gap", help="公約の方向と逆に動いた統計の変化率（%）。大きいほどギャップが大きい。発言後のデータがない場合は空欄"),
+            "pct_change_before": st.column_config.NumberColumn("発言前の変化率（参考）", help="発言時点（統計が途中で終わる場合は最新年）までの変化率（%）。発言前の状況を示す参考値で、Reality Gap には含まない"),
+            "direction_agreement": "発言後の推移",
+            "cluster_size": st.column_config.NumberColumn("類似発言", help="ほぼ同じ内容の発言の件数（分析と AI 要約は共通）")
         },
         width="stretch"
     )
@@ -122,20 +257,28 @@ def main():
     st.markdown("リストから発言を選んで、詳細な分析と現実データ（e-Stat）との比較を行います。")
     
     record_options = [f"[{r['date']}] {r['speaker']} ({r['meeting']})" for r in raw_records]
-    selected_idx = st.selectbox("分析対象の発言を選択:", range(len(record_options)), format_func=lambda x: record_options[x])
+    # 選択肢も表と同じ並び順にする
+    selected_idx = st.selectbox("分析対象の発言を選択:", [i - 1 for i in meta_df.index], format_func=lambda x: record_options[x])
     
-    selected_record = raw_records[selected_idx]
+    selected_record = segment.record(selected_idx) if segment is not None else raw_records[selected_idx]
     speech_year = selected_record['date'].split('-')[0] # Get the year for causality plot
     
-    # 遅延評価：選択された時のみ L1-L4 分析を実行
-    classifier = CLODClassifier()
-    analyzed_record = classifier.predict(selected_record.copy())
+    if classified is not None:
+        analyzed_record = classified[selected_idx]
+    elif 'L4_Final_Status' in selected_record:
+        # スターターパックに計算済みの結果をそのまま使う
+        analyzed_record = selected_record
+    else:
+        results, _ = get_result_store().classify([selected_record], get_classifier())
+        analyzed_record = results[0]
     
     col_analysis, col_chart = st.columns([1, 1])
     
     with col_analysis:
         st.markdown("#### 発言内容 (Words)")
-        st.info(f"「... {analyzed_record['voice'][:300]} ...」") # 抜粋表示
+        # 抜粋表示（コーパスの発言は先頭の300文字だけを復号する）
+        excerpt = raw_records[selected_idx].excerpt(300) if isinstance(raw_records, SpeechTable) else analyzed_record['voice'][:300]
+        st.info(f"「... {excerpt} ...」")
         
         # Evidence Badge
         if analyzed_record.get('Has_Evidence', False):
@@ -155,19 +298,26 @@ def main():
     with col_chart:
         st.markdown("#### 現実の統計推移 (Results - e-Stat)")
         
-        with st.spinner("e-Statデータを取得中... ⏳"):
-            stats_info = fetch_stats_for_keyword(keyword)
-            
+        gap = gaps.iloc[selected_idx]
         st.markdown(f"**⚡ Causality Summary**\n- **Speech Topic:** `{keyword}`\n- **Statistic:** `{stats_info['title']}`")
+        # 発言前後のトレンドを数値で示す（データのない期間は「—」）
+        fmt = lambda v, unit: "—" if pd.isna(v) else f"{v:+.1f}{unit}"
+        metric_cols = st.columns(3)
+        metric_cols[0].metric("発言前のトレンド", fmt(gap["slope_before"], "%/年"))
+        metric_cols[1].metric("発言後のトレンド", fmt(gap["slope_after"], "%/年"),
+                              None if pd.isna(gap["slope_change"]) else fmt(gap["slope_change"], "pt"))
+        metric_cols[2].metric("Reality Gap", fmt(gap["gap_score"], ""),
+                              help="発言後の統計の変化で評価します。発言後のデータがまだない場合は「—」")
         
         df_stats = pd.DataFrame(stats_info['data'])
         
         # Causality Visualization: Overlay the speech year on the reality chart
-        base_chart = alt.Chart(df_stats).mark_line(point=True).encode(
-            x=alt.X("year:O", title="年"),
-            y=alt.Y("value:Q", title=stats_info['y_label'], scale=alt.Scale(zero=False)),
-            tooltip=["year", "value"]
-        ).properties( height=250 )
+        with metrics.span("dashboard.chart"):
+            base_chart = alt.Chart(df_stats).mark_line(point=True).encode(
+                x=alt.X("year:O", title="年"),
+                y=alt.Y("value:Q", title=stats_info['y_label'], scale=alt.Scale(zero=False)),
+                tooltip=["year", "value"]
+            ).properties( height=250 )
         
         # Highlight the year the speech was made
         try:
@@ -188,10 +338,128 @@ def main():
 
     st.markdown("---")
     st.subheader("🤖 AIのやさしい要約 (Gemini Insight)")
-    with st.spinner("Geminiが発言とデータを読み解いています... ✨"):
-        # We use the full text from analyzed_record['voice'] and the stats title
-        insight_text = fetch_insight(analyzed_record.get('voice', ''), keyword, stats_info.get('title', '関連統計'))
+    # We use the full text from analyzed_record['voice'] and the stats title
+    voice = analyzed_record.get('voice', '')
+    if cluster_ids is not None:
+        voice = analysis_records[selected_idx]['voice']
+        if cluster_sizes[selected_idx] > 1:
+            st.caption(f"🔁 ほぼ同じ内容の発言が {cluster_sizes[selected_idx]} 件あります。分析と要約は代表の発言で共通化しています。")
+    title = stats_info.get('title', '関連統計')
+    # 先読み済み（ディスクキャッシュにある）要約は即座に表示し、未生成ならトークン単位でストリーミング表示する
+    insight_text = segment.insight(selected_idx) if segment is not None else None
+    if insight_text is None:
+        insight_text = get_cached_insight(voice, keyword, title)
+    if insight_text is not None:
         st.info(insight_text, icon="💡")
+    else:
+        with st.container(border=True):
+            st.write_stream(stream_insight(voice, keyword, title))
+
+# 論理的深度の色はゲージ（render_depth_gauge）と揃える
+DEPTH_SCALE = alt.Scale(domain=[LEVEL_4, LEVEL_3, LEVEL_2, LEVEL_1], range=["#28a745", "#007bff", "#ffc107", "#dc3545"])
+
+def depth_bar_chart(counts, axis, title, horizontal=False):
+    """Stacked L4 bar chart from pre-binned (bucket, l4, count) rows."""
+    bucket = alt.X("bucket:N", title=title) if not horizontal else alt.Y("bucket:N", title=title, sort="-x")
+    value = alt.Y("count:Q", title="発言数") if not horizontal else alt.X("count:Q", title="発言数")
+    encodings = {"x": bucket, "y": value} if not horizontal else {"x": value, "y": bucket}
+    return alt.Chart(counts).mark_bar().encode(
+        **encodings,
+        color=alt.Color("l4:N", scale=DEPTH_SCALE, title="論理的深度"),
+        tooltip=[alt.Tooltip("bucket:N", title=axis), alt.Tooltip("l4:N", title="論理的深度"), alt.Tooltip("count:Q", title="発言数")],
+    )
+
+def render_overview():
+    """Keyword-wide L4 distribution from pre-binned counts, with a server-side paginated table."""
+    st.sidebar.info("概観モード：ローカルコーパスの該当発言すべての傾向を、事前集計した件数から表示します。")
+    store = get_corpus_store()
+    keyword = st.sidebar.text_input("検索キーワード", value="少子化", key="overview_keyword")
+    top_n = st.sidebar.slider("発言者・会議の表示数", min_value=5, max_value=30, value=10)
+    page_size = st.sidebar.selectbox("表の1ページの件数", [25, 50, 100], index=1)
+
+    # 前回から増えた発言だけを分類して件数に足し込む
+    index = get_overview_index()
+    with st.spinner("新しい発言を集計中... ⏳"):
+        added = index.refresh(keyword)
+    total = index.total(keyword)
+    if not total:
+        st.info("👈 該当する発言がローカルコーパスにありません。Corpus Search モードの「国会APIと同期」で取得してください。")
+        return
+
+    st.subheader(f"📊 「{keyword}」に関する国会発言 {total:,} 件の概観")
+    if added:
+        st.caption(f"新しく同期された {added:,} 件を集計に追加しました。")
+
+    with metrics.span("dashboard.overview_chart"):
+        st.altair_chart(depth_bar_chart(index.counts(keyword, "time"), "年", "発言年"), width="stretch")
+        col_speaker, col_meeting = st.columns(2)
+        with col_speaker:
+            st.markdown(f"**発言者別（上位 {top_n}）**")
+            st.altair_chart(depth_bar_chart(index.counts(keyword, "speaker", top=top_n), "発言者", None, horizontal=True), width="stretch")
+        with col_meeting:
+            st.markdown(f"**会議別（上位 {top_n}）**")
+            st.altair_chart(depth_bar_chart(index.counts(keyword, "meeting", top=top_n), "会議", None, horizontal=True), width="stretch")
+
+    # 表は1ページ分だけを SQLite から取り出す（ブラウザに送る量はコーパスの大きさによらない）。
+    # 件数は集計済みの total を使い、表示のたびに COUNT で全件を走査しない
+    st.subheader("🗂️ 発言一覧")
+    pages = max(1, -(-total // page_size))
+    page = st.number_input(f"ページ（全 {pages:,} ページ）", min_value=1, max_value=pages, value=1, step=1)
+    rows = store.search_metadata(keyword, limit=page_size, offset=(page - 1) * page_size)
+    labels = get_result_store().get_many([r["id"] for r in rows])
+    page_df = pd.DataFrame(rows, columns=["id", "date", "speaker", "meeting"])
+    page_df["L4_Final_Status"] = [labels.get(r["id"], {}).get("L4_Final_Status") for r in rows]
+    page_df.index = page_df.index + 1 + (page - 1) * page_size
+    st.dataframe(
+        page_df.drop(columns="id"),
+        column_config={"date": "発言日", "speaker": "発言者", "meeting": "会議名", "L4_Final_Status": "論理的深度"},
+        width="stretch",
+    )
+
+@st.cache_resource
+def start_metrics_server():
+    # CLOD_METRICS / CLOD_METRICS_PORT は環境変数または .env から読む（プロセスごとに1回）。
+    # CLOD_METRICS_PORT を設定すると Prometheus 形式の /metrics を公開する
+    metrics.configure_from_env()
+    port = get_env("CLOD_METRICS_PORT")
+    if port:
+        metrics.enable()
+        return metrics.serve(int(port))
+    return None
+
+def render_diagnostics(profile_result):
+    """Sidebar toggles for metrics and the per-request profiler, plus the profile of this run."""
+    with st.sidebar.expander("🩺 計測・プロファイル"):
+        # メトリクスはプロセス全体で共有（全セッションの合計を記録する）
+        if st.checkbox("メトリクスを記録", value=metrics.enabled(), key="metrics_enabled") != metrics.enabled():
+            metrics.enable(not metrics.enabled())
+        st.checkbox("次の操作をプロファイル (cProfile)", key="profile_request")
+        if metrics.enabled():
+            snapshot = metrics.snapshot()
+            if snapshot["spans"]:
+                st.dataframe(
+                    pd.DataFrame(snapshot["spans"]).T[["count", "mean_ms", "max_ms", "error_rate"]].round(2),
+                    width="stretch",
+                )
+            for namespace, cache in snapshot["cache"].items():
+                st.caption(f"キャッシュ `{namespace}`: ヒット率 {cache['hit_ratio']:.0%} ({cache['hit']}/{cache['hit'] + cache['miss']})")
+            st.download_button("Prometheus 形式", metrics.prometheus_text(), file_name="metrics.prom")
+            st.download_button("JSONL スナップショット", json.dumps(snapshot, ensure_ascii=False) + "\n",
+                               file_name="metrics.jsonl")
+    if profile_result["report"]:
+        with st.expander("🔬 このリクエストのプロファイル (cumulative)"):
+            st.code(profile_result["report"])
+
+def run():
+    start_metrics_server()
+    # チェックボックスの値は前回の操作時のもの（このリクエストをプロファイルするかどうか）
+    with metrics.profile(st.session_state.get("profile_request", False)) as profile_result:
+        with metrics.span("dashboard.render"):
+            main()
+    if st.session_state.get("profile_request"):
+        # プロファイルは1回だけ。チェックボックスが描画される前に外す
+        st.session_state["profile_request"] = False
+    render_diagnostics(profile_result)
 
 if __name__ == "__main__":
-    main()
+    run()
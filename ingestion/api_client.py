@@ -1,53 +1,149 @@
-import requests
+import os
+import sys
 import json
+import time
+import threading
 import urllib.parse
 
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from ingestion import metrics
+from ingestion.settings import get_env
+
 DIET_API_URL = "https://kokkai.ndl.go.jp/api/speech"
 
-def fetch_diet_records(keyword="少子化", max_records=10, is_fallback=False):
-    """Fetch recent Diet statements containing the given keyword directly from the speech API."""
-    
-    # 1 & 2: URL-encode the keyword (UTF-8) explicitly to avoid Windows encoding issues
-    encoded_keyword = urllib.parse.quote(keyword)
-    
-    # Construct exact URL manually to ensure requests doesn't mangle it
-    url_with_params = f"{DIET_API_URL}?any={encoded_keyword}&recordPacking=json&maximumRecords={max_records}"
-    
-    # 3: Log the EXACT URL being called
+# 国会会議録APIの1リクエストあたりの最大件数（発言単位出力）
+MAX_PAGE_SIZE = 100
+# リクエスト間の最小間隔（秒）。API利用規約に従い連続アクセスを控える
+MIN_REQUEST_INTERVAL = 1.0
+MAX_RETRIES = 3
+BACKOFF_BASE = 1.0
+
+_session = None
+_session_lock = threading.Lock()
+
+
+class RateLimiter:
+    """Spaces out calls so that at most one starts every `min_interval` seconds."""
+
+    def __init__(self, min_interval):
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        self._next_time = 0.0
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            wait_time = self._next_time - now
+            self._next_time = max(now, self._next_time) + self.min_interval
+        if wait_time > 0:
+            time.sleep(wait_time)
+
+
+_rate_limiter = RateLimiter(MIN_REQUEST_INTERVAL)
+
+
+def get_session():
+    """Return the shared keep-alive session used for all Diet API requests."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            # requests は初回利用時に読み込む（import 時のコストを避ける）
+            import requests
+            from requests.adapters import HTTPAdapter
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+            _session.mount("https://", adapter)
+            _session.mount("http://", adapter)
+        return _session
+
+
+def get_diet_api_url():
+    """Speech API endpoint; CLOD_NDL_API_URL points it at a stand-in server (scripts/standin_server.py)."""
+    return get_env("CLOD_NDL_API_URL") or DIET_API_URL
+
+
+def set_rate_limit(min_interval):
+    """Change the minimum interval (seconds) between Diet API requests."""
+    _rate_limiter.min_interval = min_interval
+
+
+def _get_page(params, session):
+    """GET one page of the speech API, retrying with exponential backoff."""
+    import requests
+
+    # URL-encode the keyword (UTF-8) explicitly to avoid Windows encoding issues
+    url = f"{get_diet_api_url()}?{urllib.parse.urlencode(params, quote_via=urllib.parse.quote)}"
+    print(f"Exact Request URL: {url}")
+
+    for attempt in range(MAX_RETRIES + 1):
+        _rate_limiter.wait()
+        try:
+            with metrics.span("ndl.fetch"):
+                response = session.get(url, timeout=30)
+                response.raise_for_status()
+                return response.json()
+        except (requests.RequestException, json.JSONDecodeError) as e:
+            metrics.upstream_error("ndl")
+            status = getattr(getattr(e, "response", None), "status_code", None)
+            # 4xx（429を除く）は再試行しても結果が変わらない
+            retryable = status is None or status >= 500 or status == 429
+            if attempt == MAX_RETRIES or not retryable:
+                raise
+            delay = BACKOFF_BASE * (2 ** attempt)
+            print(f"Diet API request failed ({e}). Retrying in {delay:.1f}s...")
+            time.sleep(delay)
+
+
+def iter_diet_records(keyword="少子化", from_date=None, until_date=None, max_records=None,
+                      page_size=MAX_PAGE_SIZE, session=None):
+    """
+    Lazily walk all result pages for the keyword and yield speech records as they arrive.
+    Dates are "YYYY-MM-DD" strings; max_records=None follows nextRecordPosition to the end.
+    """
+    session = session or get_session()
+    page_size = max(1, min(page_size, MAX_PAGE_SIZE))
+    start_record = 1
+    yielded = 0
+
     print(f"Fetching Diet records for keyword: '{keyword}'")
-    print(f"Exact Request URL: {url_with_params}")
-    
-    try:
-        response = requests.get(url_with_params)
-        response.raise_for_status()
-        data = response.json()
-        
-        records = []
+    while start_record:
+        params = {
+            "any": keyword,
+            "recordPacking": "json",
+            "startRecord": start_record,
+            "maximumRecords": page_size,
+        }
+        if from_date:
+            params["from"] = from_date
+        if until_date:
+            params["until"] = until_date
+
+        data = _get_page(params, session)
+
         for speech in data.get("speechRecord", []):
             speech_text = speech.get("speech", "")
             # 只の挨拶や短い発言を除外するため少しフィルタリング
             if len(speech_text) > 30:
-                records.append({
+                yield {
                     "id": speech.get("speechID"),
                     "speaker": speech.get("speaker"),
                     "meeting": speech.get("nameOfMeeting"),
                     "date": speech.get("date"),
                     "voice": speech_text
-                })
-                
-        # 4: Fallback to ASCII keyword "GDP" if 0 results
-        if not records and not is_fallback:
-            print(f"Warning: 0 records found for '{keyword}'. Falling back to ASCII keyword 'GDP'...")
-            return fetch_diet_records(keyword="GDP", max_records=max_records, is_fallback=True)
-            
-        return records
-    except Exception as e:
-        print(f"Error fetching from Diet API: {e}")
-        # Fallback to UTF-8 safe ASCII keyword to test connection
-        if not is_fallback:
-            print(f"Exception caught. Falling back to ASCII keyword 'GDP'...")
-            return fetch_diet_records(keyword="GDP", max_records=max_records, is_fallback=True)
-        return []
+                }
+                yielded += 1
+                if max_records is not None and yielded >= max_records:
+                    return
+
+        start_record = data.get("nextRecordPosition")
+
+
+def fetch_diet_records(keyword="少子化", max_records=10, from_date=None, until_date=None):
+    """Fetch recent Diet statements containing the given keyword directly from the speech API."""
+    page_size = MAX_PAGE_SIZE if max_records is None else min(max_records, MAX_PAGE_SIZE)
+    return list(iter_diet_records(keyword, from_date=from_date, until_date=until_date,
+                                  max_records=max_records, page_size=page_size))
 
 if __name__ == "__main__":
     records = fetch_diet_records(max_records=3)
@@ -0,0 +1,409 @@
+import os
+import sys
+import sqlite3
+import argparse
+import unicodedata
+from datetime import datetime
+from contextlib import contextmanager
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from ingestion.api_client import iter_diet_records
+from ingestion.shared_cache import SingleFlight
+from ingestion.settings import get_env
+from ingestion import dedup
+from ingestion import metrics
+
+DEFAULT_DB_PATH = os.path.join(os.path.dirname(__file__), '..', 'data', 'corpus.sqlite3')
+
+# trigram トークナイザは3文字未満の語を索引から引けないため、その場合は LIKE で走査する
+MIN_INDEXED_QUERY_LENGTH = 3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS speeches (
+    rowid   INTEGER PRIMARY KEY,
+    id      TEXT UNIQUE NOT NULL,
+    speaker TEXT,
+    meeting TEXT,
+    date    TEXT,
+    voice   TEXT
+);
+CREATE INDEX IF NOT EXISTS speeches_date ON speeches(date);
+
+-- 索引には NFKC 正規化した本文を入れる（国会APIと同様に「ＤＸ」と「DX」を同一視する）
+CREATE VIRTUAL TABLE IF NOT EXISTS speeches_fts USING fts5(
+    voice, content='', tokenize='trigram'
+);
+-- 正規化済みの本文。trigram で引けない短い語の LIKE 検索はここを走査する（検索のたびに nfkc() を呼ばない）
+CREATE TABLE IF NOT EXISTS speeches_norm (
+    rowid INTEGER PRIMARY KEY,
+    voice TEXT
+);
+CREATE TRIGGER IF NOT EXISTS speeches_ai AFTER INSERT ON speeches BEGIN
+    INSERT INTO speeches_fts(rowid, voice) VALUES (new.rowid, nfkc(new.voice));
+    INSERT INTO speeches_norm(rowid, voice) VALUES (new.rowid, nfkc(new.voice));
+END;
+CREATE TRIGGER IF NOT EXISTS speeches_ad AFTER DELETE ON speeches BEGIN
+    INSERT INTO speeches_fts(speeches_fts, rowid, voice) VALUES ('delete', old.rowid, nfkc(old.voice));
+    DELETE FROM speeches_norm WHERE rowid = old.rowid;
+END;
+CREATE TRIGGER IF NOT EXISTS speeches_au AFTER UPDATE OF voice ON speeches BEGIN
+    INSERT INTO speeches_fts(speeches_fts, rowid, voice) VALUES ('delete', old.rowid, nfkc(old.voice));
+    INSERT INTO speeches_fts(rowid, voice) VALUES (new.rowid, nfkc(new.voice));
+    INSERT OR REPLACE INTO speeches_norm(rowid, voice) VALUES (new.rowid, nfkc(new.voice));
+END;
+
+-- 近似重複クラスタ（MinHash/LSH）。LSH バケットと署名はクラスタの代表発言だけが持つ
+CREATE TABLE IF NOT EXISTS speech_clusters (
+    id         TEXT PRIMARY KEY,
+    cluster_id TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS speech_clusters_cluster ON speech_clusters(cluster_id);
+CREATE TABLE IF NOT EXISTS cluster_signatures (
+    cluster_id TEXT PRIMARY KEY,
+    signature  BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS lsh_buckets (
+    band       INTEGER NOT NULL,
+    bucket     INTEGER NOT NULL,
+    cluster_id TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS lsh_buckets_key ON lsh_buckets(band, bucket);
+
+CREATE TABLE IF NOT EXISTS sync_state (
+    keyword   TEXT PRIMARY KEY,
+    last_date TEXT,
+    synced_at TEXT
+);
+
+-- 件数上限で打ち切った同期の残り。last_date 〜 until_date（当日を含む）がまだ取得できていない。
+-- 埋め終えたら last_date を newest まで進める
+CREATE TABLE IF NOT EXISTS sync_gaps (
+    keyword    TEXT PRIMARY KEY,
+    until_date TEXT NOT NULL,
+    newest     TEXT NOT NULL
+);
+"""
+
+RECORD_COLUMNS = ("id", "speaker", "meeting", "date", "voice")
+
+# 同じキーワードの同時同期（複数ユーザーのボタン操作）を1回の国会API取得にまとめる
+_sync_flights = SingleFlight()
+
+
+def normalize_text(text):
+    return unicodedata.normalize("NFKC", text) if text else ""
+
+
+class CorpusStore:
+    """
+    Local SQLite corpus of Diet speeches with an FTS5 trigram index on the speech text.
+    Records use the same dict shape as fetch_diet_records().
+    """
+
+    def __init__(self, path=None):
+        self.path = path or get_env("CLOD_CORPUS_DB", DEFAULT_DB_PATH)
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            has_norm = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'speeches_norm'"
+            ).fetchone()
+            if not has_norm:
+                # speeches_norm より前に作られたコーパス: トリガーを作り直し、既存の発言を一度だけ埋める
+                for trigger in ("speeches_ai", "speeches_ad", "speeches_au"):
+                    conn.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+            conn.executescript(SCHEMA)
+            if not has_norm:
+                conn.execute("INSERT INTO speeches_norm (rowid, voice) SELECT rowid, nfkc(voice) FROM speeches")
+
+    @contextmanager
+    def _connect(self):
+        # 接続は操作ごとに開く（Streamlit の複数スレッドから安全に使うため）
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        conn.create_function("nfkc", 1, normalize_text, deterministic=True)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def add_records(self, records):
+        """
+        Insert records, ignoring speech IDs that are already stored, and assign the new
+        speeches to near-duplicate clusters. Returns the number added.
+        """
+        rows = [tuple(r.get(col) for col in RECORD_COLUMNS) for r in records if r.get("id")]
+        if not rows:
+            return 0
+        with self._connect() as conn:
+            cursor = conn.executemany(
+                "INSERT OR IGNORE INTO speeches (id, speaker, meeting, date, voice) VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+            added = cursor.rowcount
+        if added:
+            self.assign_clusters()
+        return added
+
+    def assign_clusters(self, batch_size=1000, threshold=dedup.DEFAULT_THRESHOLD):
+        """
+        Cluster every speech that has no cluster yet (new speeches, or a corpus created before
+        deduplication existed). Each speech is compared only with the cluster representatives
+        sharing one of its LSH buckets. Returns the number of speeches assigned.
+        """
+        import numpy as np
+
+        assigned = 0
+        while True:
+            with self._connect() as conn:
+                # 書き込みロックを先に取る（同時に同期した別キーワードが同じ未割り当て行を拾わないように）
+                conn.execute("BEGIN IMMEDIATE")
+                rows = conn.execute(
+                    "SELECT s.id, s.voice FROM speeches s LEFT JOIN speech_clusters c ON c.id = s.id "
+                    "WHERE c.id IS NULL ORDER BY s.rowid LIMIT ?",
+                    (batch_size,),
+                ).fetchall()
+                if not rows:
+                    return assigned
+                for row in rows:
+                    sig = dedup.signature(row["voice"])
+                    bands = dedup.band_keys(sig)
+                    candidates = set()
+                    for band, bucket in enumerate(bands):
+                        candidates.update(
+                            r["cluster_id"] for r in conn.execute(
+                                "SELECT cluster_id FROM lsh_buckets WHERE band = ? AND bucket = ?", (band, bucket)
+                            )
+                        )
+                    best, best_score = None, threshold
+                    for cluster_id in candidates:
+                        stored = conn.execute(
+                            "SELECT signature FROM cluster_signatures WHERE cluster_id = ?", (cluster_id,)
+                        ).fetchone()
+                        score = dedup.similarity(sig, np.frombuffer(stored["signature"], dtype=np.uint32))
+                        if score >= best_score:
+                            best, best_score = cluster_id, score
+
+                    if best is None:
+                        # 新しいクラスタの代表として署名とバケットを登録する
+                        best = row["id"]
+                        conn.execute("INSERT INTO cluster_signatures (cluster_id, signature) VALUES (?, ?)",
+                                     (best, sig.tobytes()))
+                        conn.executemany("INSERT INTO lsh_buckets (band, bucket, cluster_id) VALUES (?, ?, ?)",
+                                         [(band, bucket, best) for band, bucket in enumerate(bands)])
+                    conn.execute("INSERT INTO speech_clusters (id, cluster_id) VALUES (?, ?)", (row["id"], best))
+                assigned += len(rows)
+
+    def cluster_info(self, speech_ids):
+        """Return {speech id: {"cluster_id", "cluster_size"}} for the given speeches."""
+        speech_ids = list(dict.fromkeys(speech_ids))
+        if not speech_ids:
+            return {}
+        placeholders = ",".join("?" * len(speech_ids))
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "SELECT c.id, c.cluster_id, "
+                "(SELECT COUNT(*) FROM speech_clusters m WHERE m.cluster_id = c.cluster_id) AS cluster_size "
+                f"FROM speech_clusters c WHERE c.id IN ({placeholders})",
+                speech_ids,
+            )
+            return {row["id"]: {"cluster_id": row["cluster_id"], "cluster_size": row["cluster_size"]} for row in cursor}
+
+    def get_records(self, speech_ids):
+        """Return the stored records for the given speech IDs (in the given order, missing IDs skipped)."""
+        speech_ids = list(dict.fromkeys(speech_ids))
+        if not speech_ids:
+            return []
+        placeholders = ",".join("?" * len(speech_ids))
+        with self._connect() as conn:
+            rows = {
+                row["id"]: dict(row) for row in conn.execute(
+                    f"SELECT {', '.join(RECORD_COLUMNS)} FROM speeches WHERE id IN ({placeholders})", speech_ids
+                )
+            }
+        return [rows[i] for i in speech_ids if i in rows]
+
+    def search(self, keyword, limit=30, offset=0):
+        """Return speeches containing keyword, newest first."""
+        with metrics.span("corpus.search"):
+            return self._search(keyword, limit, offset)
+
+    def _search(self, keyword, limit, offset):
+        return self.search_metadata(keyword, limit, offset, columns=RECORD_COLUMNS)
+
+    @staticmethod
+    def _match(keyword):
+        """(FROM clause, WHERE clause, params) selecting the speeches `s` that contain keyword."""
+        keyword = normalize_text(keyword)
+        if len(keyword) >= MIN_INDEXED_QUERY_LENGTH:
+            # フレーズ検索として渡す（FTS5 の演算子として解釈させない）
+            phrase = '"' + keyword.replace('"', '""') + '"'
+            return ("speeches_fts f JOIN speeches s ON s.rowid = f.rowid",
+                    "speeches_fts MATCH ?", [phrase])
+        pattern = "%" + keyword.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        return ("speeches_norm n JOIN speeches s ON s.rowid = n.rowid",
+                "n.voice LIKE ? ESCAPE '\\'", [pattern])
+
+    def search_metadata(self, keyword, limit=30, offset=0, columns=("id", "date", "speaker", "meeting")):
+        """
+        One page of the speeches containing keyword, newest first, without the body by default.
+        The dashboard's paginated tables use this so each page costs the same however many match.
+        """
+        source, where, params = self._match(keyword)
+        selected = ", ".join(f"s.{col}" for col in columns)
+        with self._connect() as conn:
+            cursor = conn.execute(
+                f"SELECT {selected} FROM {source} WHERE {where} ORDER BY s.date DESC, s.rowid DESC LIMIT ? OFFSET ?",
+                params + [limit, offset],
+            )
+            return [dict(row) for row in cursor]
+
+    def iter_matches(self, keyword, after_rowid=0, batch_size=5000):
+        """
+        Yield (last rowid, records) batches of the speeches containing keyword that were stored
+        after after_rowid, in insertion order. Used to fold newly synced speeches into aggregates.
+        """
+        source, where, params = self._match(keyword)
+        columns = ", ".join(f"s.{col}" for col in RECORD_COLUMNS)
+        while True:
+            with self._connect() as conn:
+                rows = conn.execute(
+                    f"SELECT s.rowid, {columns} FROM {source} WHERE {where} AND s.rowid > ? ORDER BY s.rowid LIMIT ?",
+                    params + [after_rowid, batch_size],
+                ).fetchall()
+            if not rows:
+                return
+            after_rowid = rows[-1]["rowid"]
+            yield after_rowid, [{col: row[col] for col in RECORD_COLUMNS} for row in rows]
+
+    def iter_batches(self, batch_size=5000):
+        """Yield all stored speeches in insertion order, batch_size records at a time."""
+        columns = ", ".join(RECORD_COLUMNS)
+        last_rowid = 0
+        while True:
+            # OFFSET ではなく rowid で続きから読む（大きなコーパスでも各バッチが定数時間）
+            with self._connect() as conn:
+                rows = conn.execute(
+                    f"SELECT rowid, {columns} FROM speeches WHERE rowid > ? ORDER BY rowid LIMIT ?",
+                    (last_rowid, batch_size),
+                ).fetchall()
+            if not rows:
+                return
+            last_rowid = rows[-1]["rowid"]
+            yield [{col: row[col] for col in RECORD_COLUMNS} for row in rows]
+
+    def count(self):
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM speeches").fetchone()[0]
+
+    def last_synced_date(self, keyword):
+        with self._connect() as conn:
+            row = conn.execute("SELECT last_date FROM sync_state WHERE keyword = ?", (keyword,)).fetchone()
+            return row["last_date"] if row else None
+
+    def sync_gap(self, keyword):
+        """The range left over by a truncated sync as {"until_date", "newest"}, or None."""
+        with self._connect() as conn:
+            row = conn.execute("SELECT until_date, newest FROM sync_gaps WHERE keyword = ?", (keyword,)).fetchone()
+            return dict(row) if row else None
+
+    def mark_gap(self, keyword, until_date, newest):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO sync_gaps (keyword, until_date, newest) VALUES (?, ?, ?) "
+                "ON CONFLICT(keyword) DO UPDATE SET until_date = excluded.until_date, "
+                "newest = max(sync_gaps.newest, excluded.newest)",
+                (keyword, until_date, newest),
+            )
+
+    def mark_synced(self, keyword, last_date):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM sync_gaps WHERE keyword = ?", (keyword,))
+            conn.execute(
+                "INSERT INTO sync_state (keyword, last_date, synced_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(keyword) DO UPDATE SET "
+                "last_date = max(coalesce(sync_state.last_date, ''), excluded.last_date), "
+                "synced_at = excluded.synced_at",
+                (keyword, last_date, datetime.now().isoformat(timespec="seconds")),
+            )
+
+
+def sync_keyword(store, keyword, max_records=None, batch_size=500):
+    """
+    Pull speeches for keyword from the Diet API that are newer than the last synced date
+    and add them to the store. Returns the number of newly stored speeches.
+    A sync stopped by max_records (new speeches) resumes from the gap it left on the next call.
+    Concurrent syncs of the same keyword into the same store share one API pass.
+    """
+    key = (os.path.abspath(store.path), keyword, max_records)
+    return _sync_flights.do(key, lambda: _sync_keyword(store, keyword, max_records, batch_size))
+
+
+def _sync_keyword(store, keyword, max_records, batch_size):
+    from_date = store.last_synced_date(keyword)
+    # 前回の同期が件数上限で打ち切られていれば、取得できなかった古い側の範囲から続ける
+    gap = store.sync_gap(keyword)
+    until_date = gap["until_date"] if gap else None
+    if until_date:
+        print(f"Syncing '{keyword}' from {from_date or 'the beginning'} until {until_date} (resuming)...")
+    elif from_date:
+        print(f"Syncing '{keyword}' from {from_date}...")
+    else:
+        print(f"Syncing '{keyword}' (first sync)...")
+
+    # 同じ日付の発言が追加されている可能性があるため、境界の日付は含めて取得する（重複は無視される）。
+    # max_records は新しく保存した件数で数える（境界で取り直した既存の発言で上限を使い切らないように）
+    added = 0
+    truncated = False
+    newest = gap["newest"] if gap else (from_date or "")
+    oldest = None
+    batch = []
+    for record in iter_diet_records(keyword, from_date=from_date, until_date=until_date):
+        batch.append(record)
+        date = record.get("date") or ""
+        newest = max(newest, date)
+        oldest = date if oldest is None else min(oldest, date)
+        if len(batch) >= batch_size or (max_records is not None and added + len(batch) >= max_records):
+            added += store.add_records(batch)
+            batch = []
+            if max_records is not None and added >= max_records:
+                truncated = True
+                break
+    added += store.add_records(batch)
+
+    if truncated:
+        # 国会APIは新しい順に返すので、打ち切った場合は from_date 〜 oldest が未取得。
+        # 最終日付は進めずに残りを記録する（進めるとその範囲は二度と取得されない）
+        store.mark_gap(keyword, oldest, newest)
+    elif newest:
+        store.mark_synced(keyword, newest)
+    print(f"Stored {added} new speeches for '{keyword}'.")
+    return added
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local Diet speech corpus.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sync_parser = sub.add_parser("sync", help="Sync keywords from the Diet API")
+    sync_parser.add_argument("keywords", nargs="+")
+    sync_parser.add_argument("--max-records", type=int, default=None)
+    search_parser = sub.add_parser("search", help="Search the local corpus")
+    search_parser.add_argument("keyword")
+    search_parser.add_argument("--limit", type=int, default=10)
+    sub.add_parser("dedup", help="Assign near-duplicate clusters to speeches that have none yet")
+    args = parser.parse_args()
+
+    store = CorpusStore()
+    if args.command == "sync":
+        for kw in args.keywords:
+            sync_keyword(store, kw, max_records=args.max_records)
+        print(f"Corpus now holds {store.count()} speeches.")
+    elif args.command == "dedup":
+        assigned = store.assign_clusters()
+        print(f"Assigned clusters to {assigned} speeches.")
+    else:
+        for r in store.search(args.keyword, limit=args.limit):
+            print(f"[{r['date']}] {r['speaker']}: {r['voice'][:100]}...\n")
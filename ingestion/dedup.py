@@ -0,0 +1,171 @@
+import re
+import zlib
+import hashlib
+import unicodedata
+
+# MinHash の署名長と LSH の分割。16バンド x 8行で、類似度 0.7 前後から候補に上がる
+NUM_PERM = 128
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+# 候補のうち、推定 Jaccard 類似度がこの値以上のものを同じクラスタとみなす
+DEFAULT_THRESHOLD = 0.8
+SHINGLE_SIZE = 5
+SEED = 20240101
+
+# 会議録の発言冒頭の「○山田太郎君　」を取り除く（話者が違っても同じ答弁は同じクラスタにする）
+SPEAKER_PREFIX = re.compile(r"^\s*○[^\s　]*[\s　]+")
+WHITESPACE = re.compile(r"[\s　]+")
+
+_coefficients = None
+
+
+def _hash_coefficients():
+    global _coefficients
+    if _coefficients is None:
+        import numpy as np
+
+        rng = np.random.default_rng(SEED)
+        # multiply-shift ハッシュ: ((a * x + b) mod 2^64) >> 32（a は奇数）
+        a = rng.integers(1, 2 ** 63, size=NUM_PERM, dtype=np.uint64) | np.uint64(1)
+        b = rng.integers(0, 2 ** 63, size=NUM_PERM, dtype=np.uint64)
+        _coefficients = (a, b)
+    return _coefficients
+
+
+def normalize_speech(text):
+    """Strip the speaker prefix, NFKC-normalize and drop whitespace."""
+    text = SPEAKER_PREFIX.sub("", text or "", count=1)
+    return WHITESPACE.sub("", unicodedata.normalize("NFKC", text))
+
+
+def shingle_hashes(text, size=SHINGLE_SIZE):
+    """32-bit hashes of the character `size`-grams of the normalized text."""
+    text = normalize_speech(text)
+    if len(text) <= size:
+        return {zlib.crc32(text.encode("utf-8"))}
+    return {zlib.crc32(text[i:i + size].encode("utf-8")) for i in range(len(text) - size + 1)}
+
+
+def signature(text):
+    """MinHash signature (uint32 array of NUM_PERM values)."""
+    import numpy as np
+
+    a, b = _hash_coefficients()
+    hashes = np.fromiter(shingle_hashes(text), dtype=np.uint64)
+    with np.errstate(over="ignore"):
+        permuted = (hashes[:, None] * a[None, :] + b[None, :]) >> np.uint64(32)
+    return permuted.min(axis=0).astype(np.uint32)
+
+
+def band_keys(sig):
+    """One stable 64-bit bucket key per LSH band."""
+    raw = sig.tobytes()
+    width = ROWS * sig.itemsize
+    return [
+        int.from_bytes(hashlib.blake2b(raw[band * width:(band + 1) * width], digest_size=8).digest(), "little", signed=True)
+        for band in range(BANDS)
+    ]
+
+
+def similarity(sig_a, sig_b):
+    """Estimated Jaccard similarity of two signatures."""
+    return float((sig_a == sig_b).mean())
+
+
+class NearDuplicateIndex:
+    """
+    In-memory MinHash/LSH index. Each added text joins the cluster whose representative
+    (first text) is most similar above threshold, or becomes a new representative. Lookups
+    only compare representatives that share an LSH bucket, so clustering n texts is
+    roughly linear instead of O(n^2).
+    """
+
+    def __init__(self, threshold=DEFAULT_THRESHOLD):
+        self.threshold = threshold
+        self._buckets = {}
+        self._signatures = {}
+        self._cluster = {}
+
+    def add(self, key, text):
+        """Index text under key and return its cluster id (the key of the cluster's first text)."""
+        sig = signature(text)
+        bands = band_keys(sig)
+        best, best_score = None, self.threshold
+        seen = set()
+        for band, bucket in enumerate(bands):
+            for other in self._buckets.get((band, bucket), ()):
+                if other in seen:
+                    continue
+                seen.add(other)
+                score = similarity(sig, self._signatures[other])
+                if score >= best_score:
+                    best, best_score = other, score
+        if best is not None:
+            self._cluster[key] = best
+            return best
+        # バケットにはクラスタの代表だけを入れる（大きなクラスタでも比較回数が増えない）
+        self._cluster[key] = key
+        self._signatures[key] = sig
+        for band, bucket in enumerate(bands):
+            self._buckets.setdefault((band, bucket), []).append(key)
+        return key
+
+    def cluster_of(self, key):
+        return self._cluster[key]
+
+    def clusters(self):
+        """{cluster id: [member keys]} in insertion order."""
+        groups = {}
+        for key, cluster in self._cluster.items():
+            groups.setdefault(cluster, []).append(key)
+        return groups
+
+
+def cluster_records(records, threshold=DEFAULT_THRESHOLD, text_field="voice"):
+    """Return the cluster id of each record (parallel list); records without an id use their position."""
+    index = NearDuplicateIndex(threshold)
+    return [
+        index.add(record.get("id") or i, record.get(text_field, ""))
+        for i, record in enumerate(records)
+    ]
+
+
+def group_by_cluster(cluster_ids):
+    """
+    Return (representatives, inverse): positions of the first record of each cluster and,
+    for every record, the index into representatives. Compute once per representative,
+    then broadcast with results[inverse[i]].
+    """
+    first = {}
+    representatives, inverse = [], []
+    for position, cluster in enumerate(cluster_ids):
+        if cluster not in first:
+            first[cluster] = len(representatives)
+            representatives.append(position)
+        inverse.append(first[cluster])
+    return representatives, inverse
+
+
+if __name__ == "__main__":
+    import os
+    import json
+    import time
+    import random
+
+    path = os.path.join(os.path.dirname(__file__), '..', 'data', 'starter_pack.json')
+    with open(path, 'r', encoding='utf-8') as f:
+        speeches = [r for records in json.load(f).values() for r in records]
+
+    # 同じ答弁を別の委員会で読み上げた、という状況を模した近似重複を混ぜる
+    rng = random.Random(0)
+    records = []
+    for i in range(2000):
+        base = rng.choice(speeches)["voice"]
+        cut = rng.randrange(len(base) // 20 + 1)
+        records.append({"id": str(i), "voice": f"○議員{i}君　" + base[cut:] + "。以上です。"})
+
+    start = time.perf_counter()
+    clusters = cluster_records(records)
+    elapsed = time.perf_counter() - start
+    print(f"{len(records)} speeches -> {len(set(clusters))} clusters in {elapsed:.2f}s "
+          f"(source speeches: {len({r['id'] for r in speeches})})")
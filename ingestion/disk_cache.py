@@ -0,0 +1,145 @@
+import os
+import json
+import time
+import hashlib
+import tempfile
+import threading
+
+# 他のプロセスの書き込みも反映するため、この回数ごとにディレクトリを数え直す
+RESCAN_EVERY = 256
+# 上限を超えたら、この割合まで減らす（満杯のまま書き込むたびに削除が走らないように）
+EVICT_TO = 0.9
+
+
+class DiskCache:
+    """
+    Small JSON file cache shared across processes.
+
+    Each entry is one file named by the SHA-256 of its key. Writes are atomic
+    (temp file + os.replace), entries expire after `ttl` seconds, and when the
+    directory grows past `max_bytes` the least recently used files are removed.
+    The directory size is tracked per process between rescans, so writes do not list it.
+    """
+
+    def __init__(self, directory, ttl=None, max_bytes=256 * 1024 * 1024):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+        # おおよその合計サイズ（None は未計測）と、前回数え直してからの書き込み回数
+        self._approx_bytes = None
+        self._writes = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(*parts):
+        """Build a stable key from JSON-serialisable parts."""
+        raw = json.dumps(parts, ensure_ascii=False, sort_keys=True, default=str)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + ".json")
+
+    def get(self, key, default=None):
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return default
+
+        if self.ttl is not None and time.time() - entry.get("created", 0) > self.ttl:
+            self.delete(key)
+            return default
+
+        # 参照時刻を更新して LRU の順序に反映する
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return entry.get("value", default)
+
+    @staticmethod
+    def _size(path):
+        try:
+            return os.stat(path).st_size
+        except OSError:
+            return 0
+
+    def set(self, key, value):
+        entry = {"created": time.time(), "value": value}
+        path = self._path(key)
+        replaced = self._size(path)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(entry, f, ensure_ascii=False, separators=(",", ":"))
+            written = os.path.getsize(tmp_path)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        if self.max_bytes is None:
+            return
+        # 書き込みごとにディレクトリ全体を stat せず、サイズを足し引きして上限を超えたときだけ削除する
+        with self._lock:
+            self._writes += 1
+            if self._approx_bytes is not None:
+                self._approx_bytes += written - replaced
+            rescan = (self._approx_bytes is None or self._approx_bytes > self.max_bytes
+                      or self._writes >= RESCAN_EVERY)
+        if rescan:
+            self.evict()
+
+    def delete(self, key):
+        path = self._path(key)
+        size = self._size(path)
+        try:
+            os.remove(path)
+        except OSError:
+            return
+        with self._lock:
+            if self._approx_bytes is not None:
+                self._approx_bytes -= size
+
+    def clear(self):
+        for name in os.listdir(self.directory):
+            if name.endswith(".json"):
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:
+                    pass
+        with self._lock:
+            self._approx_bytes = None
+
+    def evict(self):
+        """Remove least recently used entries until the cache is back under EVICT_TO of max_bytes."""
+        if self.max_bytes is None:
+            return
+        entries = []
+        total = 0
+        for name in os.listdir(self.directory):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+        if total > self.max_bytes:
+            target = self.max_bytes * EVICT_TO
+            for _, size, path in sorted(entries):
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                total -= size
+                if total <= target:
+                    break
+        with self._lock:
+            self._approx_bytes = total
+            self._writes = 0
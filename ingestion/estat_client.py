@@ -1,100 +1,208 @@
 import os
-import requests
-from dotenv import load_dotenv
+import sys
 
-load_dotenv()
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from ingestion.api_client import get_session
+from ingestion.disk_cache import DiskCache
+from ingestion.shared_cache import SingleFlight, register_namespace, invalidate
+from ingestion import metrics
+from analysis.topic_registry import load_registry
+from ingestion.settings import get_env
 
 ESTAT_API_URL = "http://api.e-stat.go.jp/rest/3.0/app/json/getStatsData"
-APP_ID = os.getenv("ESTAT_APP_ID")
 
-def fetch_stats_for_keyword(keyword="少子化"):
+def get_estat_api_url():
+    """getStatsData endpoint; CLOD_ESTAT_API_URL points it at a stand-in server."""
+    return get_env("CLOD_ESTAT_API_URL") or ESTAT_API_URL
+
+def get_app_id():
+    """Return the configured e-Stat App ID (loads .env on first use)."""
+    return get_env("ESTAT_APP_ID")
+
+# getStatsData の1リクエストあたりの最大件数
+MAX_PAGE_SIZE = 100000
+CACHE_DIR = os.path.join(os.path.dirname(__file__), '..', 'data', 'cache', 'estat')
+CACHE_TTL = 24 * 60 * 60
+CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+_cache = None
+# 同じ表の同時ダウンロードを1回にまとめる
+_flights = SingleFlight()
+
+def get_cache():
+    """Return the on-disk cache for parsed e-Stat tables."""
+    global _cache
+    if _cache is None:
+        _cache = DiskCache(CACHE_DIR, ttl=CACHE_TTL, max_bytes=CACHE_MAX_BYTES)
+    return _cache
+
+register_namespace("estat", get_cache)
+
+def stats_cache_key(stats_data_id, **params):
+    return DiskCache.make_key("getStatsData", stats_data_id, params)
+
+def _as_list(obj):
+    # e-Stat の JSON は要素が1件だけのとき配列ではなく単一オブジェクトを返す
+    if obj is None:
+        return []
+    return obj if isinstance(obj, list) else [obj]
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        # "-" や "…" などの秘匿・欠測記号
+        return float("nan")
+
+def parse_class_inf(statistical_data):
+    """Return {dimension id: {"name": ..., "codes": {code: name}}} from CLASS_INF."""
+    dimensions = {}
+    for obj in _as_list(statistical_data.get("CLASS_INF", {}).get("CLASS_OBJ")):
+        dimensions[obj["@id"]] = {
+            "name": obj.get("@name", obj["@id"]),
+            "codes": {c["@code"]: c.get("@name", c["@code"]) for c in _as_list(obj.get("CLASS"))},
+        }
+    return dimensions
+
+def iter_stats_pages(stats_data_id, page_size=MAX_PAGE_SIZE, **params):
+    """
+    Yield the STATISTICAL_DATA block of each getStatsData page, following NEXT_KEY
+    through startPosition so that only one page is held in memory at a time.
+    """
+    session = get_session()
+    start_position = 1
+    while start_position:
+        query = {
+            "appId": get_app_id(),
+            "statsDataId": stats_data_id,
+            "startPosition": start_position,
+            "limit": page_size,
+            **params,
+        }
+        with metrics.span("estat.fetch"):
+            response = session.get(get_estat_api_url(), params=query, timeout=60)
+            response.raise_for_status()
+            result = response.json().get("GET_STATS_DATA", {})
+
+        status = result.get("RESULT", {}).get("STATUS")
+        if status not in (0, "0"):
+            raise RuntimeError(f"e-Stat API error {status}: {result.get('RESULT', {}).get('ERROR_MSG')}")
+
+        statistical_data = result.get("STATISTICAL_DATA", {})
+        yield statistical_data
+        start_position = statistical_data.get("RESULT_INF", {}).get("NEXT_KEY")
+
+def fetch_stats_table(stats_data_id, use_cache=True, **params):
+    """
+    Download a full e-Stat table as a columnar DataFrame.
+    Columns are the dimension ids (tab, cat01, area, time, ...), "unit" and a float "value".
+    Returns (DataFrame, dimensions) where dimensions comes from parse_class_inf().
+    """
+    import pandas as pd
+
+    cache = get_cache()
+    key = stats_cache_key(stats_data_id, **params)
+    cached = cache.get(key) if use_cache else None
+    metrics.cache_result("estat", cached is not None)
+    if cached is None:
+        cached = _flights.do(key, lambda: _download_stats_table(stats_data_id, key, **params))
+    return pd.DataFrame(cached["columns"]), cached["dimensions"]
+
+def _download_stats_table(stats_data_id, key, **params):
+    columns = {}
+    dimensions = {}
+    rows = 0
+    for page in iter_stats_pages(stats_data_id, **params):
+        with metrics.span("estat.parse"):
+            rows = _parse_page(page, columns, dimensions, rows)
+
+    table = {"columns": columns, "dimensions": dimensions}
+    get_cache().set(key, table)
+    return table
+
+def _parse_page(page, columns, dimensions, rows):
+    """Append one page's VALUE rows to the column lists; returns the new row count."""
+    if not dimensions:
+        dimensions.update(parse_class_inf(page))
+    for item in _as_list(page.get("DATA_INF", {}).get("VALUE")):
+        for attr, raw in item.items():
+            if attr == "$":
+                continue
+            # 新しい列が途中で現れた場合はそれまでの行を None で埋める
+            columns.setdefault(attr.lstrip("@"), [None] * rows).append(raw)
+        columns.setdefault("value", [None] * rows).append(_to_float(item.get("$")))
+        rows += 1
+        for col in columns.values():
+            if len(col) < rows:
+                col.append(None)
+    return rows
+
+def to_yearly_series(df, dimensions):
+    """
+    Reduce a table to one value per year: every non-time dimension is fixed to its
+    first code (e-Stat lists the total/headline category first), then rows are
+    ordered by the time code and the first time point of each year is kept.
+    Returns [{"year": "2018", "value": ...}, ...].
+    """
+    import pandas as pd
+
+    if df.empty or "time" not in df:
+        return []
+    mask = pd.Series(True, index=df.index)
+    for dim_id, dim in dimensions.items():
+        if dim_id == "time" or dim_id not in df or not dim["codes"]:
+            continue
+        mask &= df[dim_id] == next(iter(dim["codes"]))
+    series = df[mask & df["value"].notna()].sort_values("time")
+    series = series.assign(year=series["time"].str[:4])
+    series = series[series["year"].str.isdigit()].drop_duplicates(subset="year")
+    return [
+        {"year": year, "value": value}
+        for year, value in zip(series["year"], series["value"])
+    ]
+
+def resolve_stats(keyword):
+    """Return ranked candidate e-Stat series for the keyword (see TopicRegistry.resolve)."""
+    return load_registry().resolve(keyword)
+
+def invalidate_stats(keyword):
+    """Drop the cached tables of every series the keyword resolves to (other cache entries are kept)."""
+    for candidate in resolve_stats(keyword):
+        invalidate("estat", stats_cache_key(candidate["statsDataId"]))
+
+def fetch_stats_for_keyword(keyword="少子化", stats_data_id=None, use_cache=True):
     """
     Fetch realistic statistics corresponding to the given keyword.
-    If ESTAT_APP_ID is not configured or fails, fallback to hardcoded realistic e-Stat data.
+    The series is looked up in the topic registry (best-ranked candidate unless
+    stats_data_id is given). If ESTAT_APP_ID is not configured or fails, fallback
+    to the bundled realistic e-Stat data.
     """
-    if "防衛費" in keyword:
-        dataset_info = get_fallback_defense()
-    elif "DX" in keyword or "経済" in keyword or "GDP" in keyword:
-        dataset_info = get_fallback_gdp()
-    else:
-        dataset_info = get_fallback_births()
+    if stats_data_id is None:
+        stats_data_id = resolve_stats(keyword)[0]["statsDataId"]
+    dataset_info = load_registry().dataset_info(stats_data_id)
         
-    if not APP_ID or APP_ID == "your_estat_app_id_here":
+    app_id = get_app_id()
+    if not app_id or app_id == "your_estat_app_id_here":
         print(f"Warning: e-Stat App ID not found. Using fallback data for {keyword}.")
         return dataset_info
         
     try:
-        app_id_display = APP_ID[:5] + "..." if APP_ID else "None"
+        app_id_display = app_id[:5] + "..." if app_id else "None"
         print(f"Fetching real data from e-Stat using AppID: {app_id_display} for {keyword}")
-        params = {
-            "appId": APP_ID,
-            "statsDataId": dataset_info["statsDataId"], 
-            "limit": 10
-        }
-        
-        response = requests.get(ESTAT_API_URL, params=params)
-        response.raise_for_status()
-        data = response.json()
-        
-        if data.get("GET_STATS_DATA", {}).get("RESULT", {}).get("STATUS") == 0:
-            print(f"e-Stat API request successful for {keyword}! Using hybrid statistical data for dashboard stability.")
-            return dataset_info
-        else:
-            print(f"e-Stat API returned non-zero status. Using fallback for {keyword}.")
-            return dataset_info
+        df, dimensions = fetch_stats_table(dataset_info["statsDataId"], use_cache=use_cache)
+        series = to_yearly_series(df, dimensions)
+        if series:
+            print(f"e-Stat API request successful for {keyword}! Parsed {len(series)} yearly values.")
+            return {**dataset_info, "data": series}
+        print(f"e-Stat table has no yearly series. Using fallback for {keyword}.")
+        return dataset_info
 
     except Exception as e:
+        metrics.upstream_error("estat")
         print(f"Failed to fetch from e-Stat: {e}")
         return dataset_info
 
-def get_fallback_births():
-    """Realistic demographic data of Japanese births (Ministry of Health, Labour and Welfare)."""
-    return {
-        "title": "日本の年間出生数推移 (人口動態調査)",
-        "y_label": "出生数",
-        "statsDataId": "0003411595",
-        "data": [
-            {"year": "2018", "value": 918400},
-            {"year": "2019", "value": 865239},
-            {"year": "2020", "value": 840835},
-            {"year": "2021", "value": 811622},
-            {"year": "2022", "value": 770759},
-            {"year": "2023", "value": 758631}
-        ]
-    }
-
-def get_fallback_defense():
-    """Realistic data of Japanese defense budget (in 100 millions yen)."""
-    return {
-        "title": "防衛関係費の推移 (億円)",
-        "y_label": "防衛費 (億円)",
-        "statsDataId": "0000000001", # Dummy ID
-        "data": [
-            {"year": "2018", "value": 51911},
-            {"year": "2019", "value": 52574},
-            {"year": "2020", "value": 53133},
-            {"year": "2021", "value": 53422},
-            {"year": "2022", "value": 54005},
-            {"year": "2023", "value": 68219}
-        ]
-    }
-
-def get_fallback_gdp():
-    """Realistic data of Japanese Nominal GDP (in trillion yen)."""
-    return {
-        "title": "名目GDP推移 (兆円)",
-        "y_label": "GDP (兆円)",
-        "statsDataId": "0000000002", # Dummy ID
-        "data": [
-            {"year": "2018", "value": 556},
-            {"year": "2019", "value": 557},
-            {"year": "2020", "value": 537},
-            {"year": "2021", "value": 551},
-            {"year": "2022", "value": 561},
-            {"year": "2023", "value": 591}
-        ]
-    }
-
 if __name__ == "__main__":
     for kw in ["少子化", "防衛費", "DX"]:
         stats = fetch_stats_for_keyword(kw)
@@ -0,0 +1,113 @@
+import os
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from ingestion.api_client import fetch_diet_records, set_rate_limit
+
+
+def _fetch_keyword(keyword, max_records, fetch_kwargs):
+    start = time.perf_counter()
+    records = fetch_diet_records(keyword=keyword, max_records=max_records, **fetch_kwargs)
+    return records, time.perf_counter() - start
+
+
+def load_checkpoint(checkpoint_path):
+    """Read completed keywords from a JSONL checkpoint: {keyword: (records, latency)}."""
+    done = {}
+    if not checkpoint_path or not os.path.exists(checkpoint_path):
+        return done
+    with open(checkpoint_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                # 中断時に書きかけだった最終行は無視する
+                continue
+            done[entry["keyword"]] = (entry["records"], entry["latency"])
+    return done
+
+
+def harvest_keywords(keywords, max_records=5, max_workers=8, min_request_interval=None,
+                     checkpoint_path=None, **fetch_kwargs):
+    """
+    Fetch many keywords concurrently and merge the results.
+
+    Returns a dict with:
+      - "speeches": {speechID: record}, each speech stored once
+      - "keywords": {keyword: [speechID, ...]} in API order
+      - "latency":  {keyword: seconds}
+      - "errors":   {keyword: message} for keywords that failed (not checkpointed)
+    """
+    if min_request_interval is not None:
+        set_rate_limit(min_request_interval)
+
+    keywords = list(dict.fromkeys(keywords))
+    results = load_checkpoint(checkpoint_path)
+    resumed = [kw for kw in keywords if kw in results]
+    if resumed:
+        print(f"Resuming from checkpoint: {len(resumed)}/{len(keywords)} keywords already fetched.")
+
+    errors = {}
+    pending = [kw for kw in keywords if kw not in results]
+    checkpoint = open(checkpoint_path, 'a', encoding='utf-8') if checkpoint_path else None
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(_fetch_keyword, kw, max_records, fetch_kwargs): kw
+                for kw in pending
+            }
+            for future in as_completed(futures):
+                kw = futures[future]
+                try:
+                    records, latency = future.result()
+                except Exception as e:
+                    print(f"Failed to fetch '{kw}': {e}")
+                    errors[kw] = str(e)
+                    continue
+                results[kw] = (records, latency)
+                print(f"Fetched '{kw}': {len(records)} records in {latency:.2f}s")
+                if checkpoint:
+                    checkpoint.write(json.dumps(
+                        {"keyword": kw, "records": records, "latency": latency},
+                        ensure_ascii=False,
+                    ) + "\n")
+                    checkpoint.flush()
+    finally:
+        if checkpoint:
+            checkpoint.close()
+
+    # 複数キーワードに一致した発言は speechID で1件にまとめる
+    speeches = {}
+    keyword_ids = {}
+    for kw in keywords:
+        if kw not in results:
+            continue
+        ids = []
+        for record in results[kw][0]:
+            speeches.setdefault(record["id"], record)
+            ids.append(record["id"])
+        keyword_ids[kw] = ids
+
+    return {
+        "speeches": speeches,
+        "keywords": keyword_ids,
+        "latency": {kw: results[kw][1] for kw in keyword_ids},
+        "errors": errors,
+    }
+
+
+def print_latency_report(harvest):
+    """Print per-keyword latency, slowest first."""
+    latency = harvest["latency"]
+    if not latency:
+        return
+    print("\n| Keyword | Records | Latency (s) |")
+    print("|---|---|---|")
+    for kw, seconds in sorted(latency.items(), key=lambda item: item[1], reverse=True):
+        print(f"| {kw} | {len(harvest['keywords'][kw])} | {seconds:.2f} |")
+    total = sum(len(ids) for ids in harvest["keywords"].values())
+    print(f"\n{len(harvest['speeches'])} unique speeches ({total} keyword matches).")
@@ -1,5 +1,74 @@
 import csv
 import os
+import json
+import mmap
+from itertools import islice
+
+DEFAULT_BATCH_SIZE = 10000
+# mmap で読み終えた領域を OS に返す間隔
+MMAP_RELEASE_BYTES = 64 * 1024 * 1024
+
+def _iter_lines_mmap(filepath):
+    with open(filepath, mode='rb') as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            return
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            # ページキャッシュから1行ずつ読み、読み終えたページは定期的に手放して RSS を一定に保つ
+            released = 0
+            for line in iter(mm.readline, b""):
+                yield line.decode('utf-8')
+                consumed = mm.tell() // mmap.PAGESIZE * mmap.PAGESIZE
+                if consumed - released >= MMAP_RELEASE_BYTES and hasattr(mm, "madvise"):
+                    mm.madvise(mmap.MADV_DONTNEED, released, consumed - released)
+                    released = consumed
+
+def iter_rows(filepath, use_mmap=False):
+    """
+    Stream citizen voice rows from a CSV file one dict at a time.
+    """
+    if use_mmap:
+        yield from csv.DictReader(_iter_lines_mmap(filepath))
+        return
+    with open(filepath, mode='r', encoding='utf-8', newline='') as file:
+        yield from csv.DictReader(file)
+
+def iter_records(filepath, use_mmap=False):
+    """
+    Stream records from a CSV file, a JSONL dump (one record per line) or a
+    starter pack JSON ({keyword: [records]}, de-duplicated by id).
+    """
+    if filepath.endswith(".jsonl"):
+        with open(filepath, mode='r', encoding='utf-8') as file:
+            for line in file:
+                if line.strip():
+                    yield json.loads(line)
+    elif filepath.endswith(".json"):
+        with open(filepath, mode='r', encoding='utf-8') as file:
+            starter_pack = json.load(file)
+        seen = set()
+        for records in starter_pack.values():
+            for record in records:
+                if record.get("id") in seen:
+                    continue
+                seen.add(record.get("id"))
+                yield record
+    else:
+        yield from iter_rows(filepath, use_mmap=use_mmap)
+
+def iter_batches(filepath, batch_size=DEFAULT_BATCH_SIZE, use_mmap=False):
+    """
+    Yield lists of at most batch_size row dicts. Only one batch is held in memory at a time,
+    so peak memory is independent of the file size.
+    """
+    if not os.path.exists(filepath):
+        print(f"Error: File {filepath} not found.")
+        return
+    rows = iter_records(filepath, use_mmap=use_mmap)
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            return
+        yield batch
 
 def load_data(filepath):
     """
@@ -9,18 +78,71 @@ def load_data(filepath):
     if not os.path.exists(filepath):
         print(f"Error: File {filepath} not found.")
         return []
-        
-    records = []
-    with open(filepath, mode='r', encoding='utf-8') as file:
-        reader = csv.DictReader(file)
-        for row in reader:
-            records.append(row)
-            
-    return records
+    return list(iter_rows(filepath))
+
+def _output_format(path, fmt):
+    if fmt:
+        return fmt
+    if path.endswith(".parquet"):
+        return "parquet"
+    if path.endswith(".jsonl"):
+        return "jsonl"
+    return "csv"
+
+def write_batches(batches, path, fmt=None):
+    """
+    Write an iterable of row-dict batches to CSV, JSONL or Parquet incrementally, one batch at a time.
+    Parquet output requires pyarrow. Returns the number of rows written.
+    """
+    fmt = _output_format(path, fmt)
+    written = 0
+
+    if fmt == "parquet":
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("Parquet output requires pyarrow (pip install pyarrow).") from e
+        writer = None
+        try:
+            for batch in batches:
+                if not batch:
+                    continue
+                table = pa.Table.from_pylist(batch)
+                if writer is None:
+                    writer = pq.ParquetWriter(path, table.schema)
+                writer.write_table(table.cast(writer.schema))
+                written += len(batch)
+        finally:
+            if writer is not None:
+                writer.close()
+        return written
+
+    if fmt == "jsonl":
+        with open(path, mode='w', encoding='utf-8') as file:
+            for batch in batches:
+                file.writelines(json.dumps(row, ensure_ascii=False) + "\n" for row in batch)
+                file.flush()
+                written += len(batch)
+        return written
+
+    with open(path, mode='w', encoding='utf-8', newline='') as file:
+        writer = None
+        for batch in batches:
+            if not batch:
+                continue
+            if writer is None:
+                writer = csv.DictWriter(file, fieldnames=list(batch[0].keys()), extrasaction='ignore')
+                writer.writeheader()
+            writer.writerows(batch)
+            file.flush()
+            written += len(batch)
+    return written
 
 if __name__ == "__main__":
     # Test the loader
-    data = load_data('../test_data.csv')
+    path = os.path.join(os.path.dirname(__file__), '..', 'test_data.csv')
+    data = load_data(path)
     print(f"Loaded {len(data)} records.")
     for d in data:
         print(d)
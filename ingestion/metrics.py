@@ -0,0 +1,260 @@
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+
+# 計測は既定で無効。CLOD_METRICS=1（環境変数または .env。configure_from_env() で反映）か
+# ダッシュボードのトグルで有効にする
+ENABLED = False
+
+# Prometheus ヒストグラムのバケット上限（秒）
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_lock = threading.Lock()
+_spans = {}
+_counters = {}
+
+
+class _SpanStats:
+    __slots__ = ("count", "errors", "total", "max", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * len(LATENCY_BUCKETS)
+
+    def observe(self, seconds, error):
+        self.count += 1
+        self.errors += error
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if seconds <= bound:
+                self.buckets[i] += 1
+                break
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP = _NoopSpan()
+
+
+class _Span:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        observe(self.name, time.perf_counter() - self.start, error=exc_type is not None)
+        return False
+
+
+def enable(flag=True):
+    global ENABLED
+    ENABLED = bool(flag)
+
+
+def enabled():
+    return ENABLED
+
+
+def configure_from_env():
+    """Apply CLOD_METRICS from the environment or `.env` (call from entry points; loads python-dotenv)."""
+    from ingestion.settings import get_env
+    enable(get_env("CLOD_METRICS", "") not in ("", "0"))
+
+
+def span(name):
+    """Time a block: `with metrics.span("estat.fetch"): ...`. A shared no-op when disabled."""
+    return _Span(name) if ENABLED else _NOOP
+
+
+def timed(name):
+    """Decorator form of span()."""
+    def decorator(fn):
+        def wrapper(*args, **kwargs):
+            if not ENABLED:
+                return fn(*args, **kwargs)
+            with _Span(name):
+                return fn(*args, **kwargs)
+        wrapper.__name__ = fn.__name__
+        wrapper.__doc__ = fn.__doc__
+        wrapper.__wrapped__ = fn
+        return wrapper
+    return decorator
+
+
+def observe(name, seconds, error=False):
+    with _lock:
+        stats = _spans.get(name)
+        if stats is None:
+            stats = _spans[name] = _SpanStats()
+        stats.observe(seconds, error)
+
+
+def count(name, value=1, **labels):
+    """Increment a counter, e.g. count("cache_requests", namespace="estat", result="hit")."""
+    if not ENABLED:
+        return
+    key = (name, tuple(sorted(labels.items())))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def cache_result(namespace, hit):
+    count("cache_requests", namespace=namespace, result="hit" if hit else "miss")
+
+
+def upstream_error(service):
+    count("upstream_errors", service=service)
+
+
+def counter_value(name, **labels):
+    """Current value of one counter (0 if never incremented)."""
+    with _lock:
+        return _counters.get((name, tuple(sorted(labels.items()))), 0)
+
+
+def reset():
+    with _lock:
+        _spans.clear()
+        _counters.clear()
+
+
+def snapshot():
+    """Return a JSON-serialisable view of all spans and counters, with derived ratios."""
+    with _lock:
+        spans = {
+            name: {
+                "count": s.count,
+                "errors": s.errors,
+                "error_rate": s.errors / s.count if s.count else 0.0,
+                "total_seconds": s.total,
+                "mean_ms": s.total / s.count * 1000 if s.count else 0.0,
+                "max_ms": s.max * 1000,
+            }
+            for name, s in sorted(_spans.items())
+        }
+        counters = [
+            {"name": name, "labels": dict(labels), "value": value}
+            for (name, labels), value in sorted(_counters.items())
+        ]
+
+    # キャッシュのヒット率を名前空間ごとに算出する
+    cache = {}
+    for c in counters:
+        if c["name"] == "cache_requests":
+            entry = cache.setdefault(c["labels"]["namespace"], {"hit": 0, "miss": 0})
+            entry[c["labels"]["result"]] += c["value"]
+    for entry in cache.values():
+        total = entry["hit"] + entry["miss"]
+        entry["hit_ratio"] = entry["hit"] / total if total else 0.0
+    return {"timestamp": time.time(), "spans": spans, "counters": counters, "cache": cache}
+
+
+def _labels(pairs):
+    return ",".join(f'{k}="{str(v).replace(chr(34), chr(39))}"' for k, v in pairs)
+
+
+def prometheus_text():
+    """Render all metrics in the Prometheus text exposition format."""
+    lines = [
+        "# HELP clod_span_seconds Latency of instrumented pipeline stages.",
+        "# TYPE clod_span_seconds histogram",
+    ]
+    with _lock:
+        spans = sorted(_spans.items())
+        counters = sorted(_counters.items())
+    for name, s in spans:
+        cumulative = 0
+        for bound, n in zip(LATENCY_BUCKETS, s.buckets):
+            cumulative += n
+            lines.append(f'clod_span_seconds_bucket{{span="{name}",le="{bound}"}} {cumulative}')
+        lines.append(f'clod_span_seconds_bucket{{span="{name}",le="+Inf"}} {s.count}')
+        lines.append(f'clod_span_seconds_sum{{span="{name}"}} {s.total:.6f}')
+        lines.append(f'clod_span_seconds_count{{span="{name}"}} {s.count}')
+    lines += ["# HELP clod_span_errors_total Instrumented stages that raised.", "# TYPE clod_span_errors_total counter"]
+    lines += [f'clod_span_errors_total{{span="{name}"}} {s.errors}' for name, s in spans]
+
+    names = sorted({name for (name, _), _ in counters})
+    for name in names:
+        lines.append(f"# TYPE clod_{name}_total counter")
+        for (counter, labels), value in counters:
+            if counter == name:
+                lines.append(f"clod_{name}_total{{{_labels(labels)}}} {value}")
+    return "\n".join(lines) + "\n"
+
+
+def write_jsonl(path):
+    """Append one snapshot line to a JSONL file."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(snapshot(), ensure_ascii=False) + "\n")
+
+
+def serve(port=9108, host="127.0.0.1"):
+    """Serve /metrics (Prometheus text) and /metrics.json from a daemon thread."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.startswith("/metrics.json"):
+                body, ctype = json.dumps(snapshot(), ensure_ascii=False).encode("utf-8"), "application/json"
+            elif self.path.startswith("/metrics"):
+                body, ctype = prometheus_text().encode("utf-8"), "text/plain; version=0.0.4"
+            else:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", ctype)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name="clod-metrics", daemon=True).start()
+    return server
+
+
+@contextmanager
+def profile(enabled=True, limit=25):
+    """
+    Profile the enclosed block with cProfile. Yields a dict whose "report" key holds the
+    pstats text (sorted by cumulative time) once the block exits.
+    """
+    result = {"report": None}
+    if not enabled:
+        yield result
+        return
+    import io
+    import cProfile
+    import pstats
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield result
+    finally:
+        profiler.disable()
+        out = io.StringIO()
+        pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(limit)
+        result["report"] = out.getvalue()
@@ -0,0 +1,260 @@
+import os
+import sys
+from array import array
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# 日本語の本文は UTF-16 なら1文字2バイト（UTF-8 は3バイト）で、文字位置からバイト位置を直接計算できる。
+# ただし BMP 外の文字（「𠮷」などの一部の漢字や絵文字）は4バイトになるため、それを含む本文だけは
+# 文字数を記録しておき、切り出すときに復号して位置を求める
+TEXT_ENCODING = "utf-16-le"
+CHAR_BYTES = 2
+
+META_COLUMNS = ("speaker", "meeting", "date")
+LABEL_COLUMNS = ("L1_Topic", "L2_Urgency", "L3_Actionability", "L4_Final_Status")
+
+
+class TextBuffer:
+    """Append-only buffer holding many texts back to back, addressed by character offsets."""
+
+    def __init__(self):
+        self._data = bytearray()
+        self._offsets = array("Q", [0])
+        # BMP 外の文字を含む本文の番号 -> 文字数（ほとんどの発言は含まない）
+        self._wide = {}
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def append(self, text):
+        text = text or ""
+        encoded = text.encode(TEXT_ENCODING)
+        if len(encoded) != len(text) * CHAR_BYTES:
+            self._wide[len(self)] = len(text)
+        self._data.extend(encoded)
+        self._offsets.append(len(self._data))
+        return len(self._offsets) - 2
+
+    def view(self, i, start=0, stop=None):
+        """
+        Zero-copy memoryview over characters [start:stop] of text i.
+        Release the view before appending more texts (a bytearray cannot grow while exported).
+        """
+        begin, end = self._offsets[i], self._offsets[i + 1]
+        s, e, _ = slice(start, stop).indices(self.length(i))
+        e = max(s, e)
+        if i in self._wide:
+            # 4バイトの文字があるので、文字位置をバイト位置に換算する
+            text = self._data[begin:end].decode(TEXT_ENCODING)
+            s, e = len(text[:s].encode(TEXT_ENCODING)), len(text[:e].encode(TEXT_ENCODING))
+            return memoryview(self._data)[begin + s:begin + e]
+        return memoryview(self._data)[begin + s * CHAR_BYTES:begin + e * CHAR_BYTES]
+
+    def get(self, i, start=0, stop=None):
+        return self.view(i, start, stop).tobytes().decode(TEXT_ENCODING)
+
+    def length(self, i):
+        """Number of characters (code points) in text i."""
+        if i in self._wide:
+            return self._wide[i]
+        return (self._offsets[i + 1] - self._offsets[i]) // CHAR_BYTES
+
+    def nbytes(self):
+        return len(self._data) + self._offsets.itemsize * len(self._offsets)
+
+
+class CategoricalColumn:
+    """Column of repeated strings stored as integer codes into one interned category list."""
+
+    def __init__(self, typecode="I"):
+        self.categories = []
+        self._lookup = {}
+        self.codes = array(typecode)
+
+    def __len__(self):
+        return len(self.codes)
+
+    def encode(self, value):
+        code = self._lookup.get(value)
+        if code is None:
+            code = self._lookup[value] = len(self.categories)
+            self.categories.append(value)
+        return code
+
+    def append(self, value):
+        self.codes.append(self.encode(value))
+
+    def __getitem__(self, i):
+        return self.categories[self.codes[i]]
+
+    def nbytes(self):
+        return self.codes.itemsize * len(self.codes)
+
+
+class SpeechRecord:
+    """
+    Lightweight view of one row of a SpeechTable. Supports the dict-style access the rest of
+    the code uses (record['voice'], record.get('id'), {**record}) without copying the text.
+    """
+
+    __slots__ = ("_table", "_index")
+
+    def __init__(self, table, index):
+        self._table = table
+        self._index = index
+
+    @property
+    def voice(self):
+        return self._table.texts.get(self._index)
+
+    def excerpt(self, length=300):
+        """First `length` characters of the speech, decoding only that slice."""
+        return self._table.texts.get(self._index, 0, length)
+
+    def keys(self):
+        return self._table.fields()
+
+    def __getitem__(self, key):
+        table, i = self._table, self._index
+        if key == "voice":
+            return self.voice
+        if key == "id":
+            return table.ids[i]
+        if key in table.meta:
+            return table.meta[key][i]
+        if table.classified:
+            if key in table.labels:
+                return table.labels[key][i]
+            if key == "Has_Evidence":
+                return table.labels["L3_Actionability"][i] == table.evidence_label
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __contains__(self, key):
+        return key in self.keys()
+
+    def to_dict(self):
+        return {key: self[key] for key in self.keys()}
+
+    def __repr__(self):
+        return f"SpeechRecord(id={self['id']!r}, speaker={self['speaker']!r}, date={self['date']!r})"
+
+
+class SpeechTable:
+    """
+    Columnar store for many speeches: bodies in a shared TextBuffer, speaker/meeting/date and
+    L1-L4 labels as categorical codes. Iterating yields SpeechRecord views.
+    """
+
+    def __init__(self):
+        self.ids = []
+        self.texts = TextBuffer()
+        self.meta = {col: CategoricalColumn("I") for col in META_COLUMNS}
+        # ラベルの種類は数個しかないので1バイトのコードで十分
+        self.labels = {col: CategoricalColumn("B") for col in LABEL_COLUMNS}
+        self.classified = False
+        self.evidence_label = None
+
+    @classmethod
+    def from_records(cls, records):
+        table = cls()
+        table.extend(records)
+        return table
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [SpeechRecord(self, j) for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return SpeechRecord(self, i)
+
+    def __iter__(self):
+        return (SpeechRecord(self, i) for i in range(len(self)))
+
+    def fields(self):
+        keys = ["id", *META_COLUMNS, "voice"]
+        if self.classified:
+            keys += [*LABEL_COLUMNS, "Has_Evidence"]
+        return keys
+
+    def append(self, record):
+        if self.classified:
+            raise ValueError("Cannot append to a table after classify(); build a new table instead.")
+        self.ids.append(record.get("id"))
+        for col, column in self.meta.items():
+            column.append(record.get(col) or "")
+        self.texts.append(record.get("voice"))
+
+    def extend(self, records):
+        for record in records:
+            self.append(record)
+
+    def classify(self, classifier):
+        """Fill the L1-L4 label columns in place (one scan per speech, no per-row dicts kept)."""
+        from analysis.classifier import EVIDENCE_PRESENT
+
+        for col in LABEL_COLUMNS:
+            self.labels[col] = CategoricalColumn("B")
+        for i in range(len(self)):
+            labels = classifier.labels_from_hits(classifier.scan(self.texts.get(i)))
+            for col in LABEL_COLUMNS:
+                self.labels[col].append(labels[col])
+        self.classified = True
+        self.evidence_label = EVIDENCE_PRESENT
+        return self
+
+    def assign_labels(self, labels):
+        """Fill the L1-L4 label columns from one label dict per row (e.g. results stored per cluster)."""
+        from analysis.classifier import EVIDENCE_PRESENT
+
+        if len(labels) != len(self):
+            raise ValueError(f"Expected {len(self)} label rows, got {len(labels)}")
+        for col in LABEL_COLUMNS:
+            column = self.labels[col] = CategoricalColumn("B")
+            for row in labels:
+                column.append(row[col])
+        self.classified = True
+        self.evidence_label = EVIDENCE_PRESENT
+        return self
+
+    def metadata_frame(self, columns=("date", "speaker", "meeting")):
+        """DataFrame of categorical metadata columns backed by the code arrays (no per-row strings)."""
+        import numpy as np
+        import pandas as pd
+
+        data = {}
+        for col in columns:
+            column = self.meta[col] if col in self.meta else self.labels[col]
+            codes = np.frombuffer(column.codes, dtype=np.dtype(column.codes.typecode)) if len(column) else np.array([], dtype=np.int64)
+            data[col] = pd.Categorical.from_codes(codes, categories=pd.Index(column.categories, dtype=object))
+        return pd.DataFrame(data)
+
+    def nbytes(self):
+        """Approximate payload size: text buffer plus code arrays (category strings excluded)."""
+        return (
+            self.texts.nbytes()
+            + sum(column.nbytes() for column in self.meta.values())
+            + sum(column.nbytes() for column in self.labels.values())
+        )
+
+
+if __name__ == "__main__":
+    from analysis.classifier import CLODClassifier
+
+    table = SpeechTable.from_records([
+        {"id": "1", "speaker": "山田太郎", "meeting": "本会議", "date": "2024-01-01", "voice": "出生数は前年比5％減少しました。"},
+        {"id": "2", "speaker": "佐藤花子", "meeting": "予算委員会", "date": "2024-02-01", "voice": "防衛費の倍増を実現します。"},
+    ]).classify(CLODClassifier())
+    for record in table:
+        print(record, record.excerpt(10), record["L4_Final_Status"])
+    print(table.metadata_frame())
@@ -0,0 +1,20 @@
+import os
+import threading
+
+_env_loaded = False
+_env_lock = threading.Lock()
+
+
+def get_env(name, default=None):
+    """
+    Read a setting from the environment, loading `.env` on first use.
+    Deferring python-dotenv keeps module imports cheap for code paths that never need secrets.
+    """
+    global _env_loaded
+    if not _env_loaded:
+        with _env_lock:
+            if not _env_loaded:
+                from dotenv import load_dotenv
+                load_dotenv()
+                _env_loaded = True
+    return os.getenv(name, default)
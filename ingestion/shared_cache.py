@@ -0,0 +1,83 @@
+import threading
+
+# 名前空間ごとのキャッシュ取得関数（例: "estat" -> estat_client.get_cache）
+_namespaces = {}
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+    def wait(self, timeout=None):
+        if not self.done.wait(timeout):
+            raise TimeoutError("in-flight request did not finish in time")
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent identical requests within the process: the first caller for a key
+    runs the work, callers arriving while it is in flight wait and receive the same result
+    (or exception). Streamlit sessions share one process, so upstream load follows the
+    number of distinct queries instead of the number of users.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def begin(self, key):
+        """Return (call, is_leader). The leader must call finish(key, ...) exactly once."""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                return call, False
+            call = self._calls[key] = _Call()
+            return call, True
+
+    def finish(self, key, result=None, error=None):
+        with self._lock:
+            call = self._calls.pop(key, None)
+        if call is not None:
+            call.result, call.error = result, error
+            call.done.set()
+
+    def in_flight(self, key):
+        with self._lock:
+            return key in self._calls
+
+    def do(self, key, fn):
+        call, leader = self.begin(key)
+        if not leader:
+            return call.wait()
+        try:
+            result = fn()
+        except BaseException as e:
+            self.finish(key, error=e)
+            raise
+        self.finish(key, result=result)
+        return result
+
+
+def register_namespace(name, get_cache):
+    """Register a cache (anything with delete(key) and clear()) under a namespace for scoped invalidation."""
+    _namespaces[name] = get_cache
+
+
+def namespaces():
+    return sorted(_namespaces)
+
+
+def invalidate(namespace, key=None):
+    """Drop one entry (key) or the whole namespace. Other namespaces are left untouched."""
+    cache = _namespaces[namespace]()
+    if key is None:
+        cache.clear()
+    else:
+        cache.delete(key)
@@ -0,0 +1,263 @@
+import os
+import sys
+import json
+import mmap
+import struct
+import hashlib
+import argparse
+import threading
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+PACK_DIR = os.path.join(os.path.dirname(__file__), '..', 'data', 'starter_pack')
+LEGACY_PACK_PATH = os.path.join(os.path.dirname(__file__), '..', 'data', 'starter_pack.json')
+MANIFEST_NAME = "manifest.json"
+FORMAT_VERSION = 1
+
+# セグメントファイル: MAGIC | ヘッダ長 (uint64 LE) | JSON ヘッダ | UTF-8 テキスト領域（発言本文と要約を連結）
+MAGIC = b"CLODPK1\n"
+HEADER_LENGTH = struct.Struct("<Q")
+META_COLUMNS = ("id", "speaker", "meeting", "date")
+LABEL_COLUMNS = ("L1_Topic", "L2_Urgency", "L3_Actionability", "L4_Final_Status")
+
+
+def segment_filename(keyword):
+    return hashlib.sha1(keyword.encode("utf-8")).hexdigest()[:12] + ".seg"
+
+
+def _encode_segment(keyword, records, labels, stats, insights):
+    """Serialize one keyword: metadata columns and categorical label codes in the header, texts in the blob."""
+    blob = bytearray()
+
+    def append(text):
+        start = len(blob)
+        blob.extend(text.encode("utf-8"))
+        return start, len(blob)
+
+    voice_spans = [append(r.get("voice") or "") for r in records]
+    insight_spans = [append(text) if text else None for text in insights]
+
+    header = {
+        "version": FORMAT_VERSION,
+        "keyword": keyword,
+        "count": len(records),
+        "columns": {col: [r.get(col) for r in records] for col in META_COLUMNS},
+        "voice_spans": voice_spans,
+        "insight_spans": insight_spans,
+        "stats": stats,
+    }
+    if labels is not None:
+        # ラベルは種類が少ないので、カテゴリ表 + 整数コードで持つ
+        categories, codes = {}, {}
+        for col in LABEL_COLUMNS:
+            values = [row[col] for row in labels]
+            categories[col] = list(dict.fromkeys(values))
+            lookup = {value: i for i, value in enumerate(categories[col])}
+            codes[col] = [lookup[value] for value in values]
+        header["labels"] = {
+            "categories": categories,
+            "codes": codes,
+            "Has_Evidence": [bool(row["Has_Evidence"]) for row in labels],
+        }
+    encoded = json.dumps(header, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return MAGIC + HEADER_LENGTH.pack(len(encoded)) + encoded + bytes(blob)
+
+
+class PackSegment:
+    """
+    Read-only view of one keyword segment. The file is memory-mapped; metadata is parsed
+    on open, while speech and insight texts are decoded only when a record is accessed.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, mode='rb') as file:
+            self._mm = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mm[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a starter pack segment")
+        (header_length,) = HEADER_LENGTH.unpack_from(self._mm, len(MAGIC))
+        header_start = len(MAGIC) + HEADER_LENGTH.size
+        self._header = json.loads(self._mm[header_start:header_start + header_length].decode("utf-8"))
+        self._blob_start = header_start + header_length
+
+        self.keyword = self._header["keyword"]
+        self.stats = self._header.get("stats")
+        self._columns = self._header["columns"]
+
+    def __len__(self):
+        return self._header["count"]
+
+    def _text(self, span):
+        start, end = span
+        return self._mm[self._blob_start + start:self._blob_start + end].decode("utf-8")
+
+    def metadata(self):
+        """Return [{id, speaker, meeting, date}] for every speech without touching the texts."""
+        return [
+            {col: self._columns[col][i] for col in META_COLUMNS}
+            for i in range(len(self))
+        ]
+
+    def voice(self, i):
+        return self._text(self._header["voice_spans"][i])
+
+    def labels(self, i):
+        """Precomputed L1-L4 output columns for speech i, or None if the pack has no labels."""
+        labels = self._header.get("labels")
+        if labels is None:
+            return None
+        out = {
+            col: labels["categories"][col][labels["codes"][col][i]]
+            for col in LABEL_COLUMNS
+        }
+        out["Has_Evidence"] = labels["Has_Evidence"][i]
+        return out
+
+    def insight(self, i):
+        span = self._header["insight_spans"][i]
+        return self._text(span) if span else None
+
+    def record(self, i):
+        """Full record in the predict() shape (metadata + voice + labels when available)."""
+        record = {col: self._columns[col][i] for col in META_COLUMNS}
+        record["voice"] = self.voice(i)
+        record.update(self.labels(i) or {})
+        return record
+
+    def records(self):
+        return [self.record(i) for i in range(len(self))]
+
+    def close(self):
+        self._mm.close()
+
+
+class StarterPack:
+    """Manifest plus lazily opened per-keyword segments."""
+
+    def __init__(self, directory=PACK_DIR):
+        self.directory = directory
+        with open(os.path.join(directory, MANIFEST_NAME), 'r', encoding='utf-8') as f:
+            self.manifest = json.load(f)
+        self._entries = {entry["keyword"]: entry for entry in self.manifest["keywords"]}
+        self._segments = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def exists(directory=PACK_DIR):
+        return os.path.exists(os.path.join(directory, MANIFEST_NAME))
+
+    def keywords(self):
+        return list(self._entries)
+
+    def count(self, keyword):
+        return self._entries[keyword]["count"]
+
+    def ruleset(self, keyword):
+        """Classifier ruleset fingerprint the keyword's labels were computed with (None for older packs)."""
+        return self._entries[keyword].get("ruleset")
+
+    def segment(self, keyword):
+        # 選択されたキーワードのセグメントだけを開く
+        with self._lock:
+            if keyword not in self._segments:
+                path = os.path.join(self.directory, self._entries[keyword]["file"])
+                self._segments[keyword] = PackSegment(path)
+            return self._segments[keyword]
+
+    def to_dict(self):
+        """Expand back into the legacy {keyword: [records]} shape."""
+        return {
+            kw: [{**{col: r[col] for col in META_COLUMNS}, "voice": r["voice"]} for r in self.segment(kw).records()]
+            for kw in self.keywords()
+        }
+
+
+def write_pack(starter_pack, directory=PACK_DIR, classifier=None, include_stats=True, include_insights=True):
+    """
+    Build a compact pack from {keyword: [records]}: one segment per keyword with precomputed
+    L1-L4 labels, the e-Stat series for the keyword and any already cached insights.
+    Files are written to temporary names and renamed so a running dashboard never sees a partial pack.
+    """
+    from analysis.classifier import CLODClassifier
+
+    classifier = classifier or CLODClassifier()
+    os.makedirs(directory, exist_ok=True)
+    entries = []
+    # 複数のキーワードに該当する発言は各セグメントに入る（キーワードごとに1ファイルだけ開けば済むように）。
+    # 分類は発言 ID ごとに1回だけ行う
+    labels_by_id = {}
+
+    def labels_for(record):
+        key = record.get("id") or id(record)
+        if key not in labels_by_id:
+            row = classifier.predict(dict(record))
+            labels_by_id[key] = {col: row[col] for col in LABEL_COLUMNS + ("Has_Evidence",)}
+        return labels_by_id[key]
+
+    for keyword, records in starter_pack.items():
+        labels = [labels_for(r) for r in records]
+        stats = None
+        insights = [None] * len(records)
+        if include_stats:
+            from ingestion.estat_client import fetch_stats_for_keyword
+            stats = fetch_stats_for_keyword(keyword)
+        if include_insights and stats:
+            from analysis.insight_generator import get_cached_insight
+            title = stats.get("title", "関連統計")
+            insights = [get_cached_insight(r.get("voice", ""), keyword, title) for r in records]
+
+        filename = segment_filename(keyword)
+        path = os.path.join(directory, filename)
+        with open(path + ".tmp", 'wb') as f:
+            f.write(_encode_segment(keyword, records, labels, stats, insights))
+        os.replace(path + ".tmp", path)
+        entries.append({
+            "keyword": keyword,
+            "file": filename,
+            "count": len(records),
+            "ruleset": classifier.ruleset_fingerprint(),
+            "insights": sum(1 for text in insights if text),
+        })
+        print(f"Packed '{keyword}': {len(records)} speeches, {entries[-1]['insights']} insights.")
+
+    total = sum(entry["count"] for entry in entries)
+    if total > len(labels_by_id):
+        print(f"{len(labels_by_id)} unique speeches; {total - len(labels_by_id)} repeated across keywords.")
+
+    manifest_path = os.path.join(directory, MANIFEST_NAME)
+    with open(manifest_path + ".tmp", 'w', encoding='utf-8') as f:
+        json.dump({"version": FORMAT_VERSION, "keywords": entries}, f, ensure_ascii=False, indent=2)
+    os.replace(manifest_path + ".tmp", manifest_path)
+
+    # 参照されなくなった古いセグメントを削除
+    keep = {entry["file"] for entry in entries}
+    for name in os.listdir(directory):
+        if name.endswith(".seg") and name not in keep:
+            os.remove(os.path.join(directory, name))
+    return manifest_path
+
+
+def convert_legacy(json_path=LEGACY_PACK_PATH, directory=PACK_DIR, **kwargs):
+    """Convert the legacy pretty-printed starter_pack.json into the compact pack."""
+    with open(json_path, 'r', encoding='utf-8') as f:
+        return write_pack(json.load(f), directory=directory, **kwargs)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build or inspect the compact starter pack.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build_parser = sub.add_parser("build", help="Build the pack from a legacy starter_pack.json")
+    build_parser.add_argument("--from", dest="source", default=LEGACY_PACK_PATH)
+    build_parser.add_argument("--output", default=PACK_DIR)
+    build_parser.add_argument("--no-stats", action="store_true", help="Do not embed e-Stat series")
+    sub.add_parser("show", help="List the keywords in the pack")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        path = convert_legacy(args.source, args.output, include_stats=not args.no_stats)
+        print(f"Starter pack written to {path}")
+    else:
+        pack = StarterPack()
+        for kw in pack.keywords():
+            segment = pack.segment(kw)
+            print(f"{kw}: {len(segment)} speeches, stats={'yes' if segment.stats else 'no'}")
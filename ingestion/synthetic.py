@@ -0,0 +1,178 @@
+import os
+import sys
+import math
+import random
+import argparse
+from itertools import accumulate
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# 乱数は CHUNK_SIZE 件ごとに (seed, チャンク番号) から作り直す。
+# 途中の範囲だけを生成しても、同じ seed なら同じレコードになる
+CHUNK_SIZE = 10000
+
+DEFAULT_MEDIAN_CHARS = 400
+DEFAULT_LENGTH_SIGMA = 0.8
+MIN_CHARS = 40
+MAX_CHARS = 20000
+# 文のうちキーワードを含む割合
+DEFAULT_KEYWORD_DENSITY = 0.15
+
+SURNAMES = [
+    "佐藤", "鈴木", "高橋", "田中", "伊藤", "渡辺", "山本", "中村", "小林", "加藤",
+    "吉田", "山田", "佐々木", "山口", "松本", "井上", "木村", "林", "斎藤", "清水",
+    "山崎", "森", "池田", "橋本", "阿部", "石川", "山下", "中島", "石井", "小川",
+]
+GIVEN_NAMES = [
+    "太郎", "一郎", "健一", "誠", "浩", "隆", "剛", "修", "明美", "恵子",
+    "由美子", "直子", "聡", "茂", "大輔", "翔太", "陽子", "真理子", "和夫", "正",
+]
+COMMITTEES = [
+    "本会議", "予算委員会", "厚生労働委員会", "内閣委員会", "総務委員会", "財務金融委員会",
+    "文部科学委員会", "安全保障委員会", "経済産業委員会", "国土交通委員会", "地方創生に関する特別委員会",
+]
+HOUSES = ["衆議院", "参議院"]
+
+# 文は「接続語 + 主語 + 話題 + 述語」の組み合わせで作る（数万通り。発言どうしが似すぎないように）
+CONNECTIVES = ["", "", "まず、", "また、", "さらに、", "一方で、", "その上で、", "御指摘のとおり、", "率直に申し上げて、", "この点について、"]
+SUBJECTS = [
+    "政府", "私ども", "本委員会", "関係省庁", "地方自治体", "現場の職員", "与党", "野党各党", "有識者会議",
+    "財務当局", "各都道府県", "民間事業者", "保護者の皆様", "若い世代", "経済界", "医療関係者", "教育現場", "所管省庁",
+]
+TOPICS = [
+    "制度の見直し", "予算の配分", "人材の確保", "手続の簡素化", "財源の在り方", "地域間の格差", "情報公開",
+    "規制の緩和", "現行制度の課題", "支援策の効果", "事業の執行状況", "中長期的な見通し", "事業の進捗", "運用の改善",
+    "説明責任", "関係者との調整", "周知の方法", "給付の水準", "対象範囲の拡大", "実施体制",
+]
+PREDICATES = [
+    "について検討を進めてまいります", "を丁寧に説明してまいりたいと考えております", "について認識を伺いたいと思います",
+    "に関して様々な御意見をいただいております", "を重く受け止めております", "については引き続き注視してまいります",
+    "の在り方を議論する必要があります", "について速やかに結論を得たいと考えております", "に課題があると認識しております",
+    "を含めて総合的に判断してまいります", "について現場の声を聞いてまいりました", "は極めて重要な論点であると考えます",
+]
+KEYWORD_PREDICATES = [
+    "の問題について政府の認識を伺います", "に関しては、これまでも様々な対策を講じてきたところでございます",
+    "への対応は喫緊の課題であります", "を重点項目として位置付けております", "について具体的な数字をお示しいただきたい",
+    "をめぐる状況は依然として厳しいと受け止めております", "の観点からも、しっかりと取り組んでまいります",
+]
+GREETINGS = ["", "", "ありがとうございます。", "お答えいたします。", "委員の御質問にお答えいたします。"]
+
+
+def default_keywords():
+    """The classifier vocabulary, so generated speeches exercise every layer."""
+    from analysis.classifier import CLODClassifier
+    return CLODClassifier().vocabulary()
+
+
+class SpeechGenerator:
+    """
+    Deterministic generator of Diet-speech-like records. Body lengths follow a log-normal
+    distribution (median_chars, length_sigma, clipped to [MIN_CHARS, MAX_CHARS]) and each
+    sentence carries a vocabulary keyword with probability keyword_density.
+    """
+
+    def __init__(self, seed=0, median_chars=DEFAULT_MEDIAN_CHARS, length_sigma=DEFAULT_LENGTH_SIGMA,
+                 keyword_density=DEFAULT_KEYWORD_DENSITY, keywords=None, speakers=700,
+                 start_year=2000, end_year=2025):
+        self.seed = seed
+        self.median_chars = median_chars
+        self.length_sigma = length_sigma
+        self.keyword_density = keyword_density
+        self.keywords = list(keywords) if keywords is not None else default_keywords()
+        self.start_year = start_year
+        self.end_year = end_year
+
+        names = random.Random(f"{seed}:speakers")
+        self.speakers = [f"{names.choice(SURNAMES)}{names.choice(GIVEN_NAMES)}" for _ in range(speakers)]
+        # 発言回数は一部の議員に偏る（Zipf 分布）
+        self._speaker_weights = list(accumulate(1.0 / (rank + 1) for rank in range(speakers)))
+        self.meetings = [f"{house}{name}" for house in HOUSES for name in COMMITTEES]
+
+    def _chunk_rng(self, chunk):
+        return random.Random(f"{self.seed}:{chunk}")
+
+    def _body(self, rng, target):
+        # rng.choice より random() で添字を作るほうが速い（1千万件の生成で効く）
+        random_ = rng.random
+        keywords = self.keywords
+        parts = [GREETINGS[int(random_() * len(GREETINGS))]]
+        length = len(parts[0])
+        while length < target:
+            connective = CONNECTIVES[int(random_() * len(CONNECTIVES))]
+            if keywords and random_() < self.keyword_density:
+                sentence = (f"{connective}{keywords[int(random_() * len(keywords))]}"
+                            f"{KEYWORD_PREDICATES[int(random_() * len(KEYWORD_PREDICATES))]}。")
+            else:
+                sentence = (f"{connective}{SUBJECTS[int(random_() * len(SUBJECTS))]}としては、"
+                            f"{TOPICS[int(random_() * len(TOPICS))]}{PREDICATES[int(random_() * len(PREDICATES))]}。")
+            parts.append(sentence)
+            length += len(sentence)
+        return "".join(parts)
+
+    def records(self, count, start=0):
+        """Yield records start .. start + count - 1 (the same records for the same seed)."""
+        log_median = math.log(self.median_chars)
+        years = self.end_year - self.start_year + 1
+        index = start
+        end = start + count
+        while index < end:
+            chunk = index // CHUNK_SIZE
+            rng = self._chunk_rng(chunk)
+            # チャンクの途中から始める場合は、先頭からの乱数列を読み飛ばして同じ結果にする
+            offset = chunk * CHUNK_SIZE
+            for position in range(offset, min(end, offset + CHUNK_SIZE)):
+                speaker = rng.choices(self.speakers, cum_weights=self._speaker_weights)[0]
+                meeting = rng.choice(self.meetings)
+                date = f"{self.start_year + rng.randrange(years)}-{rng.randrange(1, 13):02d}-{rng.randrange(1, 29):02d}"
+                target = min(MAX_CHARS, max(MIN_CHARS, int(rng.lognormvariate(log_median, self.length_sigma))))
+                body = self._body(rng, target)
+                if position < index:
+                    continue
+                yield {
+                    "id": f"synth{self.seed}_{position:010d}",
+                    "speaker": speaker,
+                    "meeting": meeting,
+                    "date": date,
+                    "voice": f"○{speaker}君　{body}",
+                }
+            index = min(end, offset + CHUNK_SIZE)
+
+    def batches(self, count, batch_size=CHUNK_SIZE):
+        """Yield lists of at most batch_size records (for loader.write_batches)."""
+        for start in range(0, count, batch_size):
+            yield list(self.records(min(batch_size, count - start), start=start))
+
+
+def generate_records(count, seed=0, **options):
+    """Convenience wrapper: a list of `count` synthetic records."""
+    return list(SpeechGenerator(seed=seed, **options).records(count))
+
+
+def write_corpus(path, count, seed=0, batch_size=CHUNK_SIZE, **options):
+    """Stream `count` synthetic records to CSV / JSONL / Parquet. Returns the number written."""
+    from ingestion.loader import write_batches
+    return write_batches(SpeechGenerator(seed=seed, **options).batches(count, batch_size), path)
+
+
+if __name__ == "__main__":
+    import time
+
+    parser = argparse.ArgumentParser(description="Generate a deterministic synthetic Diet-speech corpus.")
+    parser.add_argument("--count", type=int, default=10000)
+    parser.add_argument("--output", help="CSV / .jsonl / .parquet path (omit to print samples)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--median-chars", type=int, default=DEFAULT_MEDIAN_CHARS)
+    parser.add_argument("--length-sigma", type=float, default=DEFAULT_LENGTH_SIGMA)
+    parser.add_argument("--keyword-density", type=float, default=DEFAULT_KEYWORD_DENSITY)
+    args = parser.parse_args()
+
+    options = dict(median_chars=args.median_chars, length_sigma=args.length_sigma,
+                   keyword_density=args.keyword_density)
+    if not args.output:
+        for record in SpeechGenerator(seed=args.seed, **options).records(min(args.count, 3)):
+            print(f"[{record['date']}] {record['speaker']} ({record['meeting']})\n{record['voice'][:200]}...\n")
+    else:
+        start = time.perf_counter()
+        written = write_corpus(args.output, args.count, seed=args.seed, **options)
+        elapsed = time.perf_counter() - start
+        print(f"Wrote {written:,} records to {args.output} in {elapsed:.1f}s ({written / elapsed:,.0f} records/sec)")
@@ -0,0 +1,111 @@
+import os
+import sys
+import json
+import time
+import random
+import argparse
+
+import pandas as pd
+
+# Ensure imports work
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from analysis.classifier import CLODClassifier
+
+OUTPUT_COLUMNS = ["L1_Topic", "L2_Urgency", "L3_Actionability", "Has_Evidence", "L4_Final_Status"]
+# 生成テキストでキーワードの間に挟む語（数字・記号・空白を含む）
+FILLER = ["について", "は", "を", "の", "。", "、", "2024年", "5", "％", " ", "検討", "\n"]
+# 欠損や空の本文
+EDGE_VOICES = [None, float("nan"), "", " ", "。"]
+
+def load_sample_records():
+    path = os.path.join(os.path.dirname(__file__), '..', 'data', 'starter_pack.json')
+    with open(path, 'r', encoding='utf-8') as f:
+        starter_pack = json.load(f)
+    return [r for records in starter_pack.values() for r in records]
+
+def overlap_joins(vocabulary):
+    """Strings where two keywords share characters (the end of one is the start of the next)."""
+    joins = []
+    for a in vocabulary:
+        for b in vocabulary:
+            joins += [a + b[k:] for k in range(1, min(len(a), len(b))) if a != b and a.endswith(b[:k])]
+    return joins
+
+def generated_records(classifier, count=3000, seed=0):
+    """
+    Deterministic texts mixing the vocabulary, overlapping keyword joins and filler,
+    plus missing / empty voices, for checking predict_batch() against predict().
+    """
+    rng = random.Random(seed)
+    vocabulary = classifier.vocabulary()
+    pieces = vocabulary + overlap_joins(vocabulary) + FILLER
+    records = [{"id": f"edge{i}", "voice": voice} for i, voice in enumerate(EDGE_VOICES)]
+    for i in range(count):
+        voice = "".join(rng.choice(pieces) for _ in range(rng.randint(1, 12)))
+        records.append({"id": f"gen{i}", "voice": voice})
+    return records
+
+def overlapping_classifier():
+    """
+    A classifier whose vocabulary also holds prefixes and suffixes of the topic keywords,
+    so most texts take KeywordIndex's overlapping-match path.
+    """
+    from analysis.matcher import KeywordIndex
+
+    classifier = CLODClassifier()
+    fragments = {kw[:-1] for kw in classifier.l1_mapping if len(kw) > 2} | {kw[1:] for kw in classifier.l1_mapping if len(kw) > 2}
+    classifier.evidence_keywords = classifier.evidence_keywords + sorted(fragments - set(classifier.vocabulary()))
+    classifier.index = KeywordIndex(list(classifier.l1_mapping) + classifier.strong_keywords + classifier.evidence_keywords)
+    return classifier
+
+def check_parity(classifier, records):
+    """Compare predict_batch() against predict() record by record."""
+    frame = classifier.predict_batch(records)
+    mismatches = 0
+    for i, record in enumerate(records):
+        expected = classifier.predict(record)
+        row = frame.iloc[i]
+        if any(expected[col] != row[col] for col in OUTPUT_COLUMNS):
+            mismatches += 1
+    return mismatches
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark CLODClassifier predict vs predict_batch.")
+    parser.add_argument("--records", type=int, default=100000, help="Number of records to classify")
+    args = parser.parse_args()
+
+    classifier = CLODClassifier()
+    sample = load_sample_records()
+
+    overlapping = overlapping_classifier()
+    checks = [
+        ("starter pack", classifier, sample),
+        ("generated", classifier, generated_records(classifier)),
+        ("overlapping vocabulary", overlapping, generated_records(overlapping)),
+    ]
+    failed = False
+    for name, checked, records in checks:
+        mismatches = check_parity(checked, records)
+        print(f"Parity check ({name}): {len(records) - mismatches}/{len(records)} records identical")
+        failed = failed or mismatches > 0
+    if failed:
+        sys.exit(1)
+
+    records = (sample * (args.records // len(sample) + 1))[:args.records]
+    frame = pd.DataFrame(records)
+
+    # DataFrame -> DataFrame の比較（アーカイブ処理の実際の形）
+    start = time.perf_counter()
+    pd.DataFrame([classifier.predict(record) for record in frame.to_dict("records")])
+    loop_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    classifier.classify_frame(frame)
+    batch_elapsed = time.perf_counter() - start
+
+    print(f"predict (loop):  {len(records) / loop_elapsed:,.0f} records/sec")
+    print(f"classify_frame:  {len(records) / batch_elapsed:,.0f} records/sec")
+
+if __name__ == "__main__":
+    main()
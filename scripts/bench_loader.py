@@ -0,0 +1,72 @@
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import resource
+import tempfile
+import subprocess
+
+# Ensure imports work
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from ingestion.loader import iter_batches, write_batches
+from analysis.classifier import CLODClassifier, classify_batches
+
+def write_sample_csv(path, rows):
+    """Write a CSV of `rows` citizen voices sampled from the starter pack speeches."""
+    pack_path = os.path.join(os.path.dirname(__file__), '..', 'data', 'starter_pack.json')
+    with open(pack_path, 'r', encoding='utf-8') as f:
+        voices = [r['voice'] for records in json.load(f).values() for r in records]
+    rng = random.Random(0)
+    write_batches(
+        ([{"id": i, "voice": rng.choice(voices)} for i in range(start, min(start + 10000, rows))]
+         for start in range(0, rows, 10000)),
+        path,
+    )
+
+def peak_rss_mb():
+    # Linux の ru_maxrss は KB 単位
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def run_pipeline(input_path, output_path, batch_size, use_mmap):
+    classifier = CLODClassifier()
+    start = time.perf_counter()
+    rows = write_batches(
+        classify_batches(iter_batches(input_path, batch_size=batch_size, use_mmap=use_mmap), classifier),
+        output_path,
+    )
+    elapsed = time.perf_counter() - start
+    print(json.dumps({"rows": rows, "rows_per_sec": rows / elapsed, "peak_rss_mb": peak_rss_mb()}))
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the streaming loader -> classifier -> writer pipeline.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[20000, 80000],
+                        help="Input sizes to compare; peak RSS should stay flat across them")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--mmap", action="store_true", help="Read the input through mmap")
+    parser.add_argument("--run", nargs=2, metavar=("INPUT", "OUTPUT"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        run_pipeline(args.run[0], args.run[1], args.batch_size, args.mmap)
+        return
+
+    print("| Rows | Input (MB) | Rows/sec | Peak RSS (MB) |")
+    print("|---|---|---|---|")
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in args.rows:
+            input_path = os.path.join(tmp, f"voices_{rows}.csv")
+            output_path = os.path.join(tmp, f"classified_{rows}.csv")
+            write_sample_csv(input_path, rows)
+            # サイズごとに別プロセスで実行し、ピーク RSS を独立に測る
+            cmd = [sys.executable, __file__, "--run", input_path, output_path, "--batch-size", str(args.batch_size)]
+            if args.mmap:
+                cmd.append("--mmap")
+            result = json.loads(subprocess.run(cmd, capture_output=True, text=True, check=True).stdout.strip().splitlines()[-1])
+            size_mb = os.path.getsize(input_path) / 1024 / 1024
+            print(f"| {rows:,} | {size_mb:,.0f} | {result['rows_per_sec']:,.0f} | {result['peak_rss_mb']:,.1f} |")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import resource
+import subprocess
+
+# Ensure imports work
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from ingestion.records import SpeechTable
+from analysis.classifier import CLODClassifier
+
+def iter_sample_records(count, text_chars, seed=0):
+    """
+    Yield `count` distinct speech records built from starter pack excerpts. Each record gets its
+    own text object, like records parsed from API responses.
+    """
+    pack_path = os.path.join(os.path.dirname(__file__), '..', 'data', 'starter_pack.json')
+    with open(pack_path, 'r', encoding='utf-8') as f:
+        source = [r for records in json.load(f).values() for r in records]
+    rng = random.Random(seed)
+    speakers = [f"議員{i}" for i in range(700)]
+    meetings = [f"第{n}回国会 {name}" for n in range(200, 216) for name in ("本会議", "予算委員会", "厚生労働委員会", "内閣委員会")]
+    for i in range(count):
+        voice = rng.choice(source)["voice"]
+        start = rng.randrange(max(1, len(voice) - text_chars))
+        yield {
+            "id": f"{i:012d}",
+            "speaker": rng.choice(speakers),
+            "meeting": rng.choice(meetings),
+            "date": f"20{rng.randrange(15, 26)}-{rng.randrange(1, 13):02d}-{rng.randrange(1, 29):02d}",
+            # f-string で新しい文字列を作り、レコードごとに別オブジェクトにする
+            "voice": f"{i}:{voice[start:start + text_chars]}",
+        }
+
+def peak_rss_mb():
+    # Linux の ru_maxrss は KB 単位
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def current_rss_mb():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * resource.getpagesize() / 1024 / 1024
+
+def run(kind, count, text_chars, classify):
+    baseline = current_rss_mb()
+    classifier = CLODClassifier() if classify else None
+    start = time.perf_counter()
+    if kind == "dicts":
+        records = list(iter_sample_records(count, text_chars))
+        if classify:
+            records = [classifier.predict(r) for r in records]
+        excerpt = records[count // 2]["voice"][:300]
+    else:
+        records = SpeechTable.from_records(iter_sample_records(count, text_chars))
+        if classify:
+            records.classify(classifier)
+        excerpt = records[count // 2].excerpt(300)
+    elapsed = time.perf_counter() - start
+    assert excerpt
+    print(json.dumps({
+        "resident_mb": current_rss_mb() - baseline,
+        "peak_rss_mb": peak_rss_mb(),
+        "seconds": elapsed,
+    }))
+
+def main():
+    parser = argparse.ArgumentParser(description="Memory benchmark: list of dicts vs SpeechTable.")
+    parser.add_argument("--count", type=int, default=1_000_000)
+    parser.add_argument("--text-chars", type=int, default=200, help="Characters per speech body")
+    parser.add_argument("--no-classify", action="store_true", help="Skip L1-L4 labels")
+    parser.add_argument("--run", choices=("dicts", "table"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        run(args.run, args.count, args.text_chars, not args.no_classify)
+        return
+
+    print(f"{args.count:,} speeches, {args.text_chars} chars each, classified={not args.no_classify}\n")
+    print("| Representation | Resident (MB) | Peak RSS (MB) | Build time (s) |")
+    print("|---|---|---|---|")
+    for kind in ("dicts", "table"):
+        # 表現ごとに別プロセスで実行し、メモリを独立に測る
+        cmd = [sys.executable, __file__, "--run", kind, "--count", str(args.count), "--text-chars", str(args.text_chars)]
+        if args.no_classify:
+            cmd.append("--no-classify")
+        result = json.loads(subprocess.run(cmd, capture_output=True, text=True, check=True).stdout.strip().splitlines()[-1])
+        print(f"| {kind} | {result['resident_mb']:,.0f} | {result['peak_rss_mb']:,.0f} | {result['seconds']:.1f} |")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+import gc
+import os
+import sys
+import json
+import math
+import time
+import argparse
+import platform
+import statistics
+import tempfile
+import tracemalloc
+import subprocess
+
+# Ensure imports work
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), '..', 'data', 'benchmarks', 'baseline.json')
+DEFAULT_SIZES = (10000, 100000)
+# ベースラインからこの割合を超えて悪化したら失敗にする
+TIME_TOLERANCE = 0.30
+MEMORY_TOLERANCE = 0.20
+# 小さすぎる差はノイズとして無視する
+MIN_TIME_DELTA = 0.05
+MIN_MEMORY_DELTA_MB = 8.0
+# 時間の悪化はこの回数以上計測したときだけ判定する（1回だけの計測はぶれが大きい）
+MIN_REPEAT_FOR_TIME_CHECK = 3
+
+STATS_INFO = {
+    "desired_direction": 1,
+    "data": [{"year": str(y), "value": v} for y, v in zip(
+        range(2015, 2024), [1005721, 977242, 946146, 918400, 865239, 840835, 811622, 770759, 758631])],
+}
+
+
+# 各コンポーネントは準備をしてから計測対象の関数を返す。準備の時間とメモリは計測に含めない
+
+def bench_generate(n, workdir):
+    from ingestion.synthetic import SpeechGenerator
+    from collections import deque
+    generator = SpeechGenerator(seed=0)
+    # レコードは保持せずに捨てる（生成だけの速度。件数によらずメモリは一定）
+    return lambda: deque(generator.records(n), maxlen=0)
+
+
+def bench_predict(n, workdir):
+    from ingestion.synthetic import generate_records
+    from analysis.classifier import CLODClassifier
+    records = generate_records(n)
+    classifier = CLODClassifier()
+    return lambda: [classifier.predict(r) for r in records]
+
+
+def bench_classify_frame(n, workdir):
+    import pandas as pd
+    from ingestion.synthetic import generate_records
+    from analysis.classifier import CLODClassifier
+    frame = pd.DataFrame(generate_records(n))
+    classifier = CLODClassifier()
+    return lambda: classifier.classify_frame(frame)
+
+
+def bench_load_data(n, workdir):
+    from ingestion.synthetic import write_corpus
+    from ingestion.loader import load_data
+    path = os.path.join(workdir, f"synthetic_{n}.csv")
+    write_corpus(path, n)
+    return lambda: load_data(path)
+
+
+def bench_stream_classify(n, workdir):
+    """The streaming path of scripts/classify_corpus.py; memory should stay flat as n grows."""
+    from ingestion.synthetic import write_corpus
+    from ingestion.loader import iter_batches, write_batches
+    from analysis.classifier import CLODClassifier, classify_batches
+    input_path = os.path.join(workdir, f"synthetic_{n}.jsonl")
+    output_path = os.path.join(workdir, f"classified_{n}.jsonl")
+    write_corpus(input_path, n)
+    classifier = CLODClassifier()
+    return lambda: write_batches(classify_batches(iter_batches(input_path, batch_size=5000), classifier), output_path)
+
+
+def bench_dashboard_table(n, workdir):
+    """The table building in dashboard main(): columnar records, metadata frame, Reality Gap, options."""
+    from ingestion.synthetic import generate_records
+    from ingestion.records import SpeechTable
+    from analysis.reality_gap import gap_frame
+    # pandas の import 分のメモリを計測に含めないよう、先に読み込んでおく
+    import pandas  # noqa: F401
+    records = generate_records(n)
+
+    def run():
+        table = SpeechTable.from_records(records)
+        meta_df = table.metadata_frame(["date", "speaker", "meeting"])
+        gaps = gap_frame(table, STATS_INFO)
+        meta_df["gap_score"] = gaps["gap_score"].round(1)
+        options = [f"[{r['date']}] {r['speaker']} ({r['meeting']})" for r in table]
+        return meta_df, options
+
+    return run
+
+
+def bench_dedup(n, workdir):
+    from ingestion.synthetic import generate_records
+    from ingestion.dedup import cluster_records
+    records = generate_records(n)
+    return lambda: cluster_records(records)
+
+
+COMPONENTS = {
+    "generate": bench_generate,
+    "predict": bench_predict,
+    "classify_frame": bench_classify_frame,
+    "load_data": bench_load_data,
+    "stream_classify": bench_stream_classify,
+    "dashboard_table": bench_dashboard_table,
+    "dedup": bench_dedup,
+}
+
+
+def run_component(name, n, repeat):
+    """Measure one component in this process; prints one JSON line."""
+    with tempfile.TemporaryDirectory() as workdir:
+        fn = COMPONENTS[name](n, workdir)
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = fn()
+            times.append(time.perf_counter() - start)
+            del result
+        # ピークメモリは tracemalloc で別に1回だけ測る（計測区間で確保した分だけを数える。
+        # RSS だと準備で使って解放した領域が再利用され、実際より小さく見える。時間には含めない）
+        gc.collect()
+        tracemalloc.start()
+        result = fn()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        del result
+    print(json.dumps({"seconds": min(times), "median_seconds": statistics.median(times),
+                      "spread": (max(times) - min(times)) / min(times) if min(times) else 0.0,
+                      "peak_mb": peak / 1024 / 1024}))
+
+
+def measure(name, n, repeat):
+    """Run a component in a fresh interpreter so peak memory is measured independently."""
+    cmd = [sys.executable, __file__, "--run", name, str(n), "--repeat", str(repeat)]
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"{name}@{n} failed:\n{result.stderr[-2000:]}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def machine_info():
+    return {"python": platform.python_version(), "machine": platform.machine(), "cpus": os.cpu_count()}
+
+
+def load_baseline(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def find_regressions(results, baseline, time_tolerance, memory_tolerance, check_time=True):
+    """Regressions against the baseline; times are compared only when check_time is set."""
+    regressions = []
+    for key, current in results.items():
+        base = baseline["results"].get(key)
+        if not base:
+            continue
+        slower = current["seconds"] - base["seconds"]
+        if check_time and slower > MIN_TIME_DELTA and current["seconds"] > base["seconds"] * (1 + time_tolerance):
+            regressions.append(f"{key}: {current['seconds']:.3f}s vs baseline {base['seconds']:.3f}s "
+                               f"({current['seconds'] / base['seconds'] - 1:+.0%})")
+        grown = current["peak_mb"] - base["peak_mb"]
+        if grown > MIN_MEMORY_DELTA_MB and current["peak_mb"] > base["peak_mb"] * (1 + memory_tolerance):
+            regressions.append(f"{key}: peak {current['peak_mb']:.0f} MB vs baseline {base['peak_mb']:.0f} MB "
+                               f"({current['peak_mb'] / max(base['peak_mb'], 1e-9) - 1:+.0%})")
+    return regressions
+
+
+def print_scaling(results, components, sizes):
+    """Time growth exponent between consecutive sizes (1.0 = linear)."""
+    if len(sizes) < 2:
+        return
+    print("\n| Component | " + " | ".join(f"{a:,} -> {b:,}" for a, b in zip(sizes, sizes[1:])) + " |")
+    print("|---|" + "---|" * (len(sizes) - 1))
+    for name in components:
+        cells = []
+        for a, b in zip(sizes, sizes[1:]):
+            ta, tb = results[f"{name}@{a}"]["seconds"], results[f"{name}@{b}"]["seconds"]
+            cells.append(f"n^{math.log(tb / ta) / math.log(b / a):.2f}" if ta > 0 and tb > 0 else "-")
+        print(f"| {name} | " + " | ".join(cells) + " |")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the hot paths on synthetic corpora and compare against stored baselines.")
+    parser.add_argument("--components", nargs="+", choices=list(COMPONENTS), default=list(COMPONENTS))
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES),
+                        help="Corpus sizes in records. In-memory components hold the whole corpus (~2 KB/record); "
+                             "generate and stream_classify scale to 10,000,000")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help=f"Best of N timings per component (time regressions need N >= {MIN_REPEAT_FOR_TIME_CHECK})")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--update-baseline", action="store_true", help="Store these results as the new baseline")
+    parser.add_argument("--time-tolerance", type=float, default=TIME_TOLERANCE)
+    parser.add_argument("--memory-tolerance", type=float, default=MEMORY_TOLERANCE)
+    parser.add_argument("--run", nargs=2, metavar=("COMPONENT", "N"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        run_component(args.run[0], int(args.run[1]), args.repeat)
+        return
+    if args.update_baseline and args.repeat < MIN_REPEAT_FOR_TIME_CHECK:
+        parser.error(f"--update-baseline needs --repeat >= {MIN_REPEAT_FOR_TIME_CHECK}")
+
+    baseline = load_baseline(args.baseline)
+    same_machine = baseline is not None and baseline.get("machine") == machine_info()
+    if baseline and not same_machine:
+        print(f"Note: baseline was recorded on {baseline.get('machine')}; this machine is {machine_info()}. "
+              "Timings are not compared; record a baseline here with --update-baseline.")
+
+    check_time = same_machine and args.repeat >= MIN_REPEAT_FOR_TIME_CHECK
+    results = {}
+    print("| Component | Records | Time (s) | Median (s) | Spread | Records/sec | Peak (MB) | Baseline (s) | Baseline (MB) |")
+    print("|---|---|---|---|---|---|---|---|---|")
+    for name in args.components:
+        for n in sorted(args.sizes):
+            key = f"{name}@{n}"
+            results[key] = current = measure(name, n, args.repeat)
+            base = (baseline or {}).get("results", {}).get(key, {})
+            if check_time and base and find_regressions({key: current}, baseline, args.time_tolerance, float("inf")):
+                # 遅く見えたらもう一度計測し、速いほうを採用する（一時的な負荷による誤検出を避ける）
+                retry = measure(name, n, args.repeat)
+                if retry["seconds"] < current["seconds"]:
+                    results[key] = current = retry
+            print(f"| {name} | {n:,} | {current['seconds']:.3f} | {current['median_seconds']:.3f} | "
+                  f"{current['spread']:.0%} | {n / current['seconds']:,.0f} | {current['peak_mb']:.0f} | "
+                  f"{base.get('seconds', float('nan')):.3f} | {base.get('peak_mb', float('nan')):.0f} |")
+    print_scaling(results, args.components, sorted(args.sizes))
+
+    if args.update_baseline:
+        merged = (baseline or {}).get("results", {}) if baseline and baseline.get("machine") == machine_info() else {}
+        merged.update(results)
+        os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump({"machine": machine_info(), "results": dict(sorted(merged.items()))}, f, indent=2)
+            f.write("\n")
+        print(f"\nBaseline written to {args.baseline}")
+        return
+
+    if baseline is None:
+        print("\nNo baseline found; run with --update-baseline to record one.")
+        return
+    if same_machine and not check_time:
+        print(f"\nNote: timings from fewer than {MIN_REPEAT_FOR_TIME_CHECK} repeats are too noisy to compare; "
+              "only peak memory is checked.")
+    regressions = find_regressions(results, baseline, args.time_tolerance, args.memory_tolerance, check_time)
+    if regressions:
+        print("\n" + "!" * 60)
+        print("PERFORMANCE REGRESSION against the stored baseline:")
+        for regression in regressions:
+            print(f"  - {regression}")
+        print("!" * 60)
+        sys.exit(1)
+    print("\nNo regressions against the stored baseline.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+import os
+import sys
+import subprocess
+import argparse
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# モジュールごとの import 時間の上限（ミリ秒、cumulative）
+BUDGETS_MS = {
+    "analysis.classifier": 50,
+    "analysis.insight_generator": 50,
+    "ingestion.api_client": 30,
+    "ingestion.estat_client": 50,
+    "ingestion.corpus_store": 50,
+    "ingestion.harvester": 50,
+    # streamlit / pandas / altair は描画に必須なので、それ以外が増えていないかを見る
+    "dashboard.app": 3000,
+}
+
+# import 時に読み込んではいけないモジュール（初回利用時まで遅延させる）
+DEFERRED_MODULES = ("requests", "google.genai", "dotenv")
+
+def measure(module):
+    """Run `python -X importtime` in a fresh interpreter; return (cumulative ms, imported module names)."""
+    code = f"import sys; sys.path.insert(0, {ROOT!r}); import {module}"
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True, text=True, cwd=ROOT,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+
+    cumulative_us = None
+    imported = set()
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        parts = line.split("|")
+        name = parts[2].strip()
+        imported.add(name)
+        if name == module:
+            cumulative_us = int(parts[1])
+    return cumulative_us / 1000.0, imported
+
+def main():
+    parser = argparse.ArgumentParser(description="Check module import times against the budget.")
+    parser.add_argument("--runs", type=int, default=3, help="Take the fastest of N runs to reduce noise")
+    args = parser.parse_args()
+
+    failures = []
+    print("| Module | Import (ms) | Budget (ms) |")
+    print("|---|---|---|")
+    for module, budget in BUDGETS_MS.items():
+        runs = [measure(module) for _ in range(args.runs)]
+        elapsed = min(ms for ms, _ in runs)
+        imported = runs[0][1]
+        print(f"| {module} | {elapsed:.1f} | {budget} |")
+
+        if elapsed > budget:
+            failures.append(f"{module} took {elapsed:.1f} ms (budget {budget} ms)")
+        eager = [m for m in DEFERRED_MODULES if m in imported]
+        if eager:
+            failures.append(f"{module} imports {', '.join(eager)} eagerly")
+
+    if failures:
+        print("\nImport-time budget exceeded:")
+        for failure in failures:
+            print(f"  - {failure}")
+        sys.exit(1)
+    print("\nAll modules within budget.")
+
+if __name__ == "__main__":
+    main()
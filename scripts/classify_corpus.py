@@ -0,0 +1,114 @@
+import os
+import sys
+import time
+import zlib
+import argparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+# Ensure imports work
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from ingestion.loader import iter_records, write_batches
+from analysis.classifier import CLODClassifier
+
+_classifier = None
+
+def _init_worker():
+    # ワーカーごとに1回だけ分類器（キーワード索引）を構築する
+    global _classifier
+    _classifier = CLODClassifier()
+
+def _classify_chunk(chunk):
+    """Runs in a worker process: classify a whole chunk and report timing."""
+    start = time.perf_counter()
+    results = [_classifier.predict(record) for record in chunk]
+    return os.getpid(), time.perf_counter() - start, results
+
+def parse_shard(value):
+    """Parse "i/n" into (i, n) with 0 <= i < n."""
+    try:
+        index, count = (int(part) for part in value.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError("--shard must look like i/n, e.g. 0/4")
+    if count < 1 or not 0 <= index < count:
+        raise argparse.ArgumentTypeError("--shard i/n requires 0 <= i < n")
+    return index, count
+
+def in_shard(record, position, shard):
+    """
+    Stable shard assignment: by CRC32 of the record id when present (so every
+    machine agrees regardless of input order), otherwise by input position.
+    """
+    index, count = shard
+    record_id = record.get("id")
+    key = zlib.crc32(str(record_id).encode("utf-8")) if record_id not in (None, "") else position
+    return key % count == index
+
+def iter_chunks(records, chunk_size, shard=None):
+    chunk = []
+    for position, record in enumerate(records):
+        if shard and not in_shard(record, position, shard):
+            continue
+        chunk.append(record)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def ordered_map(executor, fn, iterable, window):
+    """
+    Like executor.map, but keeps at most `window` chunks in flight so the input is
+    consumed lazily. Results come back in input order.
+    """
+    pending = deque()
+    for item in iterable:
+        pending.append(executor.submit(fn, item))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+def classify_corpus(input_path, output_path, workers=None, chunk_size=2000, shard=None):
+    workers = workers or os.cpu_count() or 1
+    worker_stats = {}
+    total = 0
+    start = time.perf_counter()
+
+    def results():
+        nonlocal total
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+            chunks = iter_chunks(iter_records(input_path), chunk_size, shard)
+            for pid, elapsed, batch in ordered_map(executor, _classify_chunk, chunks, window=workers * 2):
+                records, busy = worker_stats.get(pid, (0, 0.0))
+                worker_stats[pid] = (records + len(batch), busy + elapsed)
+                total += len(batch)
+                yield batch
+
+    write_batches(results(), output_path)
+    elapsed = time.perf_counter() - start
+
+    print("\n| Worker (pid) | Records | Busy (s) | Records/sec |")
+    print("|---|---|---|---|")
+    for pid, (records, busy) in sorted(worker_stats.items()):
+        rate = records / busy if busy else 0
+        print(f"| {pid} | {records:,} | {busy:.2f} | {rate:,.0f} |")
+    print(f"\nClassified {total:,} records with {workers} workers in {elapsed:.2f}s "
+          f"({total / elapsed if elapsed else 0:,.0f} records/sec) -> {output_path}")
+    return total
+
+def main():
+    parser = argparse.ArgumentParser(description="Classify a speech/voice corpus (L1-L4) across a process pool.")
+    parser.add_argument("input", help="CSV (citizen voices), JSONL dump or starter pack JSON")
+    parser.add_argument("output", help="Output file (.jsonl, .csv or .parquet); rows keep input order")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--chunk-size", type=int, default=2000, help="Records shipped to a worker per task")
+    parser.add_argument("--shard", type=parse_shard, default=None,
+                        help="Only classify shard i of n (e.g. 0/4) to split work across machines")
+    args = parser.parse_args()
+
+    classify_corpus(args.input, args.output, workers=args.workers, chunk_size=args.chunk_size, shard=args.shard)
+
+if __name__ == "__main__":
+    main()
@@ -1,31 +1,69 @@
 import os
 import json
 import sys
+import argparse
 
 # Ensure imports work
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from ingestion.api_client import fetch_diet_records
+from ingestion.harvester import harvest_keywords, print_latency_report
+from ingestion.starter_pack import write_pack
+
+DEFAULT_KEYWORDS = ["少子化", "防衛費", "DX"]
 
 def main():
-    keywords = ["少子化", "防衛費", "DX"]
-    starter_pack = {}
-    
-    print("Generating Starter Pack Data...")
-    for kw in keywords:
-        print(f"Fetching data for: {kw}")
-        # Fetch a reasonable number of records for the starter pack (e.g., 5)
-        records = fetch_diet_records(keyword=kw, max_records=5)
-        starter_pack[kw] = records
-        
+    parser = argparse.ArgumentParser(description="Generate the dashboard starter pack.")
+    parser.add_argument("keywords", nargs="*", help="Keywords to fetch (default: %(default)s)",
+                        default=DEFAULT_KEYWORDS)
+    parser.add_argument("--keywords-file", help="Text file with one keyword per line")
+    # Fetch a reasonable number of records for the starter pack (e.g., 5)
+    parser.add_argument("--max-records", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=8, help="Concurrent keyword fetches")
+    parser.add_argument("--interval", type=float, default=None,
+                        help="Minimum seconds between API requests across all workers")
+    parser.add_argument("--checkpoint", help="JSONL checkpoint file to resume an interrupted run")
+    args = parser.parse_args()
+
+    keywords = list(args.keywords)
+    if args.keywords_file:
+        with open(args.keywords_file, 'r', encoding='utf-8') as f:
+            keywords += [line.strip() for line in f if line.strip()]
+
+    print(f"Generating Starter Pack Data for {len(keywords)} keywords...")
+    harvest = harvest_keywords(
+        keywords,
+        max_records=args.max_records,
+        max_workers=args.workers,
+        min_request_interval=args.interval,
+        checkpoint_path=args.checkpoint,
+    )
+    print_latency_report(harvest)
+
+    if harvest["errors"]:
+        # 不完全なパックで既存ファイルを上書きしない
+        print(f"Failed keywords: {', '.join(harvest['errors'])}. Re-run with --checkpoint to resume.")
+        sys.exit(1)
+
+    # 複数のキーワードに該当する発言は、該当するキーワードごとに同じ内容が入る（キーワード単位で読めるように）
+    speeches = harvest["speeches"]
+    starter_pack = {
+        kw: [speeches[speech_id] for speech_id in ids]
+        for kw, ids in harvest["keywords"].items()
+    }
+
     data_dir = os.path.join(os.path.dirname(__file__), '..', 'data')
     os.makedirs(data_dir, exist_ok=True)
-    
+
     output_file = os.path.join(data_dir, 'starter_pack.json')
     with open(output_file, 'w', encoding='utf-8') as f:
         json.dump(starter_pack, f, ensure_ascii=False, indent=2)
-        
-    print(f"Starter pack saved to {output_file}")
+
+    total = sum(len(records) for records in starter_pack.values())
+    print(f"Starter pack saved to {output_file} ({total} entries, {len(speeches)} unique speeches)")
+
+    # ダッシュボード用のコンパクト版（分類結果・統計・キャッシュ済み要約を同梱）
+    manifest = write_pack(starter_pack)
+    print(f"Compact starter pack saved to {manifest}")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,215 @@
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Ensure imports work
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from standin_server import add_server_arguments, server_from_args
+
+STAGES = ("ingest", "classify", "stats", "insight", "pipeline")
+PERCENTILES = (50, 95, 99)
+
+
+def percentile(sorted_values, p):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return float("nan")
+    rank = max(1, -(-len(sorted_values) * p // 100))
+    return sorted_values[int(rank) - 1]
+
+
+class StageTimer:
+    """Thread-safe per-stage latency samples."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples = {stage: [] for stage in STAGES}
+        self.errors = {stage: 0 for stage in STAGES}
+        self.items = {stage: 0 for stage in STAGES}
+
+    def record(self, stage, seconds, items=1, error=False):
+        with self._lock:
+            self.samples[stage].append(seconds)
+            self.items[stage] += items
+            self.errors[stage] += error
+
+    def mark_error(self, stage, count=1):
+        with self._lock:
+            self.errors[stage] += count
+
+    def summary(self, wall_seconds):
+        rows = {}
+        for stage in STAGES:
+            values = sorted(self.samples[stage])
+            rows[stage] = {
+                "count": len(values),
+                "errors": self.errors[stage],
+                "items": self.items[stage],
+                **{f"p{p}_ms": percentile(values, p) * 1000 for p in PERCENTILES},
+                "throughput_per_s": len(values) / wall_seconds if wall_seconds else 0.0,
+                "items_per_s": self.items[stage] / wall_seconds if wall_seconds else 0.0,
+            }
+        return rows
+
+
+def configure_environment(env, workdir):
+    """Point the clients at the stand-in and keep caches and databases out of data/."""
+    os.environ.update(env)
+    os.environ.setdefault("GEMINI_API_KEY", "standin")
+    # fetch_stats_for_keyword は App ID がないとフォールバックデータを返すので、ダミーを入れる
+    if not os.environ.get("ESTAT_APP_ID"):
+        os.environ["ESTAT_APP_ID"] = "standin"
+
+    from ingestion import api_client, estat_client
+    from analysis import insight_generator
+
+    # 利用規約上の待ち時間は実APIのためのもの。スタンドインでは外して純粋な処理能力を測る
+    api_client.set_rate_limit(0)
+    api_client.BACKOFF_BASE = 0.05
+    estat_client.CACHE_DIR = os.path.join(workdir, 'cache', 'estat')
+    insight_generator.CACHE_DIR = os.path.join(workdir, 'cache', 'insights')
+
+
+def run_load_test(keywords, requests, concurrency, max_records, insights_per_request, cold, workdir):
+    """
+    Run `requests` dashboard-like pipelines (ingest -> classify -> stats -> insight), spread
+    over keywords, on `concurrency` threads. Returns (StageTimer, wall seconds).
+    """
+    from ingestion.corpus_store import CorpusStore, sync_keyword
+    from ingestion.estat_client import fetch_stats_for_keyword
+    from analysis.classifier import CLODClassifier
+    from analysis.result_store import ResultStore
+    from analysis.insight_generator import generate_insight
+    from ingestion import metrics
+
+    store = CorpusStore(os.path.join(workdir, 'corpus.sqlite3'))
+    results = ResultStore(os.path.join(workdir, 'classifications.sqlite3'))
+    classifier = CLODClassifier()
+    timer = StageTimer()
+
+    def timed(stage, fn, items=lambda result: 1):
+        start = time.perf_counter()
+        try:
+            result = fn()
+        except Exception as e:
+            timer.record(stage, time.perf_counter() - start, items=0, error=True)
+            print(f"{stage} failed: {e}")
+            return None
+        timer.record(stage, time.perf_counter() - start, items=items(result))
+        return result
+
+    def pipeline(i):
+        keyword = keywords[i % len(keywords)]
+        start = time.perf_counter()
+        timed("ingest", lambda: sync_keyword(store, keyword, max_records=max_records), items=lambda added: added)
+        records = store.search(keyword, limit=max_records)
+        timed("classify", lambda: results.classify(records, classifier), items=lambda _: len(records))
+        stats = timed("stats", lambda: fetch_stats_for_keyword(keyword, use_cache=not cold)) or {}
+        title = stats.get("title", "関連統計")
+        for record in records[:insights_per_request]:
+            # generate_insight はエラー時も文言を返すので、失敗は先頭の文字で判定する
+            text = timed("insight", lambda: generate_insight(record["voice"], keyword, title, use_cache=not cold))
+            if text is not None and text.startswith(("⚠️", "AIの要約生成中にエラー")):
+                timer.mark_error("insight")
+        timer.record("pipeline", time.perf_counter() - start)
+
+    # fetch_stats_for_keyword は失敗してもフォールバックの統計を返すので、
+    # 失敗の数は upstream_errors{service="estat"} の増分で数える
+    metrics.enable()
+    estat_errors = metrics.counter_value("upstream_errors", service="estat")
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(pipeline, range(requests)))
+    wall_seconds = time.perf_counter() - start
+    timer.mark_error("stats", metrics.counter_value("upstream_errors", service="estat") - estat_errors)
+    return timer, wall_seconds
+
+
+def print_report(rows, wall_seconds, baseline=None):
+    print(f"\nWall time: {wall_seconds:.2f}s")
+    header = f"{'stage':<10}{'count':>7}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'req/s':>9}{'items/s':>10}"
+    if baseline:
+        header += f"{'p95 vs base':>13}"
+    print(header)
+    for stage, row in rows.items():
+        line = (f"{stage:<10}{row['count']:>7}{row['errors']:>8}{row['p50_ms']:>10.1f}{row['p95_ms']:>10.1f}"
+                f"{row['p99_ms']:>10.1f}{row['throughput_per_s']:>9.2f}{row['items_per_s']:>10.1f}")
+        base = (baseline or {}).get(stage)
+        if base and base.get("p95_ms"):
+            line += f"{(row['p95_ms'] / base['p95_ms'] - 1) * 100:>+12.1f}%"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Drive the ingestion -> classification -> stats -> insight pipeline against the stand-in server.")
+    parser.add_argument("--keywords", nargs="+", default=["少子化", "防衛費", "DX"])
+    parser.add_argument("--requests", type=int, default=30, help="Pipelines to run in total")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--max-records", type=int, default=30, help="Speeches per keyword (ingest and classify)")
+    parser.add_argument("--insights-per-request", type=int, default=3)
+    parser.add_argument("--cold", action="store_true", help="Bypass the e-Stat and insight caches")
+    parser.add_argument("--upstream", default=None,
+                        help="Base URL of an already running stand-in (default: start one in-process)")
+    parser.add_argument("--output", help="Write the results as JSON")
+    parser.add_argument("--compare", help="Previous --output JSON to compare p95 latency against")
+    add_server_arguments(parser)
+    args = parser.parse_args()
+
+    server = None
+    if args.upstream:
+        base = args.upstream.rstrip("/")
+        env = {
+            "CLOD_NDL_API_URL": base + "/api/speech",
+            "CLOD_ESTAT_API_URL": base + "/rest/3.0/app/json/getStatsData",
+            "GEMINI_BASE_URL": base + "/",
+        }
+    else:
+        server = server_from_args(args).start()
+        env = server.env()
+        print(f"Stand-in server on {server.base_url}")
+
+    from ingestion import metrics
+
+    with tempfile.TemporaryDirectory(prefix="clod-load-") as workdir:
+        configure_environment(env, workdir)
+        timer, wall_seconds = run_load_test(
+            args.keywords, args.requests, args.concurrency, args.max_records,
+            args.insights_per_request, args.cold, workdir,
+        )
+
+    rows = timer.summary(wall_seconds)
+    baseline = None
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)["stages"]
+    print_report(rows, wall_seconds, baseline)
+
+    snapshot = metrics.snapshot()
+    for namespace, entry in snapshot["cache"].items():
+        print(f"cache {namespace}: hit ratio {entry['hit_ratio']:.0%} ({entry['hit']} hit / {entry['miss']} miss)")
+    if server:
+        print(f"upstream requests: {server.requests}, injected errors: {server.errors}")
+        server.stop()
+
+    if args.output:
+        result = {
+            "config": {k: v for k, v in vars(args).items() if k not in ("output", "compare")},
+            "wall_seconds": wall_seconds,
+            "stages": rows,
+            "metrics": snapshot,
+        }
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
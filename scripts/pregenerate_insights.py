@@ -0,0 +1,54 @@
+import os
+import sys
+import json
+import argparse
+
+# Ensure imports work
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from ingestion.estat_client import resolve_stats
+from analysis.insight_generator import generate_insights_batch
+
+def load_items_from_starter_pack():
+    path = os.path.join(os.path.dirname(__file__), '..', 'data', 'starter_pack.json')
+    with open(path, 'r', encoding='utf-8') as f:
+        starter_pack = json.load(f)
+    for keyword, records in starter_pack.items():
+        yield keyword, records
+
+def load_items_from_corpus(keywords, limit):
+    from ingestion.corpus_store import CorpusStore
+    store = CorpusStore()
+    for keyword in keywords:
+        records = store.search(keyword, limit=limit)
+        # 近似重複はクラスタの代表発言の要約を共有するので、代表だけを生成する
+        clusters = store.cluster_info([r["id"] for r in records])
+        cluster_ids = [clusters.get(r["id"], {}).get("cluster_id", r["id"]) for r in records]
+        yield keyword, store.get_records(cluster_ids)
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-generate Gemini insights into the shared disk cache.")
+    parser.add_argument("--corpus", nargs="+", metavar="KEYWORD",
+                        help="Use the top speeches for these keywords from the local corpus instead of the starter pack")
+    parser.add_argument("--limit", type=int, default=30, help="Speeches per keyword when using --corpus")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--tokens-per-minute", type=int, default=250000)
+    args = parser.parse_args()
+
+    if args.corpus:
+        groups = load_items_from_corpus(args.corpus, args.limit)
+    else:
+        groups = load_items_from_starter_pack()
+
+    items = []
+    for keyword, records in groups:
+        # ダッシュボードと同じ統計タイトルを使い、同じキャッシュキーになるようにする
+        title = resolve_stats(keyword)[0]["title"]
+        items += [(r["voice"], keyword, title) for r in records]
+
+    print(f"Pre-generating insights for {len(items)} speeches...")
+    stats = generate_insights_batch(items, max_workers=args.workers, tokens_per_minute=args.tokens_per_minute)
+    print(f"Cached: {stats['cached']}, generated: {stats['generated']}, failed: {stats['failed']}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,378 @@
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Ensure imports work
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from analysis.topic_registry import load_registry
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'data')
+STARTER_PACK_PATH = os.path.join(DATA_DIR, 'starter_pack.json')
+# record サブコマンドの保存先（ndl/<keyword>.json, estat/<statsDataId>.json, gemini.json）
+RECORDINGS_DIR = os.path.join(DATA_DIR, 'standin')
+
+NDL_PATH = "/api/speech"
+ESTAT_PATH = "/rest/3.0/app/json/getStatsData"
+GEMINI_PREFIX = "/v1beta/models/"
+
+DEFAULT_INSIGHT = (
+    "この発言は「{keyword}」について強い問題意識を示していますが、具体的な数値目標や期限には触れていません。\n\n"
+    "関連する統計を見ると、発言の前後で状況が大きく改善したとは言えず、政策の効果を検証する余地があります。\n\n"
+    "今後は予算措置と成果指標をセットで示し、進捗を定期的に公開することが求められます。"
+)
+
+
+def _load_json(path, default):
+    if not os.path.exists(path):
+        return default
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+class Recordings:
+    """
+    Responses the stand-in replays. Recorded files under RECORDINGS_DIR take precedence;
+    otherwise speeches come from the starter pack and e-Stat tables from the registry fallback series.
+    """
+
+    def __init__(self, directory=RECORDINGS_DIR, estat_areas=1):
+        self.speeches = []
+        seen = set()
+        ndl_dir = os.path.join(directory, 'ndl')
+        sources = [_load_json(STARTER_PACK_PATH, {})]
+        if os.path.isdir(ndl_dir):
+            sources += [{name: _load_json(os.path.join(ndl_dir, name), [])} for name in sorted(os.listdir(ndl_dir))]
+        for source in sources:
+            for records in source.values():
+                for r in records:
+                    if r["id"] not in seen:
+                        seen.add(r["id"])
+                        self.speeches.append(r)
+
+        self.estat_dir = os.path.join(directory, 'estat')
+        self.estat_areas = max(1, estat_areas)
+        self.insights = _load_json(os.path.join(directory, 'gemini.json'), [])
+        self.registry = load_registry()
+
+    def speeches_for(self, keyword, total):
+        """Speeches containing keyword (all speeches when none match), cycled up to total with suffixed ids."""
+        matched = [r for r in self.speeches if keyword and keyword in r["voice"]] or self.speeches
+        if total is None or total <= len(matched) or not matched:
+            return matched
+        speeches = []
+        for i in range(total):
+            r = matched[i % len(matched)]
+            speeches.append(r if i < len(matched) else {**r, "id": f"{r['id']}_r{i // len(matched)}"})
+        return speeches
+
+    def stats_values(self, stats_data_id):
+        """(CLASS_INF, VALUE rows) for a table: a recorded response or the registry fallback."""
+        recorded = _load_json(os.path.join(self.estat_dir, f"{stats_data_id}.json"), None)
+        if recorded is not None:
+            data = recorded["GET_STATS_DATA"]["STATISTICAL_DATA"]
+            values = data["DATA_INF"]["VALUE"]
+            return data["CLASS_INF"], values if isinstance(values, list) else [values]
+
+        series = self.registry.dataset_info(stats_data_id).get("data", [])
+        areas = [f"{i:05d}" for i in range(self.estat_areas)]
+        class_inf = {"CLASS_OBJ": [
+            {"@id": "tab", "@name": "表章項目", "CLASS": {"@code": "001", "@name": "実数"}},
+            {"@id": "area", "@name": "地域", "CLASS": [
+                {"@code": code, "@name": "全国" if i == 0 else f"地域{i}"} for i, code in enumerate(areas)
+            ]},
+            {"@id": "time", "@name": "時間軸", "CLASS": [
+                {"@code": f"{p['year']}000000", "@name": f"{p['year']}年"} for p in series
+            ]},
+        ]}
+        # 地域を増やすと行数が増え、ページングとパースの負荷を再現できる
+        values = [
+            {"@tab": "001", "@area": code, "@time": f"{p['year']}000000", "$": str(p["value"] if i == 0 else p["value"] // (i + 1))}
+            for i, code in enumerate(areas)
+            for p in series
+        ]
+        return class_inf, values
+
+    def insight(self, prompt):
+        if self.insights:
+            return random.choice(self.insights)
+        keyword = prompt.split("テーマ: ", 1)[1].split(")", 1)[0] if "テーマ: " in prompt else "政策"
+        return DEFAULT_INSIGHT.format(keyword=keyword)
+
+
+class StandinServer:
+    """
+    Local replacement for the Diet speech API, e-Stat getStatsData and the Gemini REST API,
+    with tunable latency, page size and error injection. Runs in a daemon thread.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, jitter=0.0, service_latency=None,
+                 error_rate=0.0, error_status=503, page_size=None, records_per_query=None,
+                 stream_chunks=8, recordings=None, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.service_latency = service_latency or {}
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.page_size = page_size
+        self.records_per_query = records_per_query
+        self.stream_chunks = stream_chunks
+        self.recordings = recordings or Recordings()
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.requests = {"ndl": 0, "estat": 0, "gemini": 0}
+        self.errors = {"ndl": 0, "estat": 0, "gemini": 0}
+        self.httpd = ThreadingHTTPServer((host, port), self._handler())
+        self.httpd.daemon_threads = True
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def env(self):
+        """Environment variables that point the clients at this server."""
+        return {
+            "CLOD_NDL_API_URL": self.base_url + NDL_PATH,
+            "CLOD_ESTAT_API_URL": self.base_url + ESTAT_PATH,
+            "GEMINI_BASE_URL": self.base_url + "/",
+        }
+
+    def start(self):
+        threading.Thread(target=self.httpd.serve_forever, name="clod-standin", daemon=True).start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def _delay(self, service, default=None):
+        base = self.service_latency.get(service, self.latency if default is None else default)
+        with self._lock:
+            jitter = self._random.uniform(-self.jitter, self.jitter) if self.jitter else 0.0
+        if base + jitter > 0:
+            time.sleep(base + jitter)
+
+    def _inject_error(self, service):
+        with self._lock:
+            self.requests[service] += 1
+            failed = self.error_rate > 0 and self._random.random() < self.error_rate
+            if failed:
+                self.errors[service] += 1
+        return failed
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _send_json(self, payload, status=200):
+                body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _route(self, method):
+                url = urllib.parse.urlsplit(self.path)
+                query = dict(urllib.parse.parse_qsl(url.query))
+                if method == "GET" and url.path == NDL_PATH:
+                    service, handler = "ndl", lambda: self._ndl(query)
+                elif method == "GET" and url.path == ESTAT_PATH:
+                    service, handler = "estat", lambda: self._estat(query)
+                elif method == "POST" and url.path.startswith(GEMINI_PREFIX):
+                    service, handler = "gemini", lambda: self._gemini(url.path, query)
+                else:
+                    self.send_error(404)
+                    return
+
+                if method == "POST":
+                    length = int(self.headers.get("Content-Length") or 0)
+                    self.body = json.loads(self.rfile.read(length) or b"{}")
+                server._delay(service)
+                if server._inject_error(service):
+                    self._send_json({"error": {"code": server.error_status, "message": "injected error"}},
+                                    status=server.error_status)
+                    return
+                handler()
+
+            def do_GET(self):
+                self._route("GET")
+
+            def do_POST(self):
+                self._route("POST")
+
+            def _ndl(self, query):
+                start = int(query.get("startRecord", 1))
+                maximum = int(query.get("maximumRecords", 30))
+                if server.page_size:
+                    maximum = min(maximum, server.page_size)
+                speeches = server.recordings.speeches_for(query.get("any", ""), server.records_per_query)
+                # 国会APIと同じく from / until（当日を含む）で絞り込み、新しい順に返す
+                speeches = [r for r in speeches if query.get("from", "") <= r.get("date", "") <= query.get("until", "9999")]
+                speeches.sort(key=lambda r: r.get("date", ""), reverse=True)
+                page = speeches[start - 1:start - 1 + maximum]
+                payload = {
+                    "numberOfRecords": len(speeches),
+                    "numberOfReturn": len(page),
+                    "startRecord": start,
+                    "nextRecordPosition": start + len(page) if start - 1 + len(page) < len(speeches) else None,
+                    "speechRecord": [
+                        {"speechID": r["id"], "speaker": r["speaker"], "nameOfMeeting": r["meeting"],
+                         "date": r["date"], "speech": r["voice"]}
+                        for r in page
+                    ],
+                }
+                self._send_json(payload)
+
+            def _estat(self, query):
+                class_inf, values = server.recordings.stats_values(query.get("statsDataId", ""))
+                start = int(query.get("startPosition", 1))
+                limit = int(query.get("limit", 100000))
+                if server.page_size:
+                    limit = min(limit, server.page_size)
+                page = values[start - 1:start - 1 + limit]
+                result_inf = {"TOTAL_NUMBER": len(values), "FROM_NUMBER": start, "TO_NUMBER": start + len(page) - 1}
+                if start - 1 + len(page) < len(values):
+                    result_inf["NEXT_KEY"] = start + len(page)
+                self._send_json({"GET_STATS_DATA": {
+                    "RESULT": {"STATUS": 0, "ERROR_MSG": "正常に終了しました。"},
+                    "STATISTICAL_DATA": {"RESULT_INF": result_inf, "CLASS_INF": class_inf, "DATA_INF": {"VALUE": page}},
+                }})
+
+            def _gemini(self, path, query):
+                model, _, action = path[len(GEMINI_PREFIX):].partition(":")
+                prompt = "".join(
+                    part.get("text", "")
+                    for content in self.body.get("contents", [])
+                    for part in content.get("parts", [])
+                )
+                text = server.recordings.insight(prompt)
+
+                def response(chunk):
+                    return {
+                        "candidates": [{"content": {"parts": [{"text": chunk}], "role": "model"}, "index": 0}],
+                        "usageMetadata": {"promptTokenCount": len(prompt), "candidatesTokenCount": len(chunk)},
+                        "modelVersion": model,
+                    }
+
+                if action != "streamGenerateContent":
+                    self._send_json(response(text))
+                    return
+
+                # SSE で少しずつ返す。チャンク間にも遅延を入れてトークン生成を模す
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                step = max(1, -(-len(text) // max(1, server.stream_chunks)))
+                for i in range(0, len(text), step):
+                    if i:
+                        server._delay("gemini_chunk", default=0.0)
+                    chunk = json.dumps(response(text[i:i + step]), ensure_ascii=False)
+                    self.wfile.write(f"data: {chunk}\r\n\r\n".encode("utf-8"))
+                    self.wfile.flush()
+                self.close_connection = True
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+def record(keywords, max_records, directory=RECORDINGS_DIR):
+    """Save live API responses so the stand-in can replay them offline."""
+    from ingestion.api_client import fetch_diet_records
+    from ingestion.estat_client import resolve_stats, iter_stats_pages
+
+    os.makedirs(os.path.join(directory, 'ndl'), exist_ok=True)
+    os.makedirs(os.path.join(directory, 'estat'), exist_ok=True)
+    for keyword in keywords:
+        records = fetch_diet_records(keyword, max_records=max_records)
+        with open(os.path.join(directory, 'ndl', f"{keyword}.json"), 'w', encoding='utf-8') as f:
+            json.dump(records, f, ensure_ascii=False)
+        print(f"Recorded {len(records)} speeches for '{keyword}'.")
+
+        stats_data_id = resolve_stats(keyword)[0]["statsDataId"]
+        class_inf, values = None, []
+        for page in iter_stats_pages(stats_data_id):
+            class_inf = class_inf or page.get("CLASS_INF", {})
+            value = page.get("DATA_INF", {}).get("VALUE", [])
+            values += value if isinstance(value, list) else [value]
+        payload = {"GET_STATS_DATA": {"STATISTICAL_DATA": {"CLASS_INF": class_inf, "DATA_INF": {"VALUE": values}}}}
+        with open(os.path.join(directory, 'estat', f"{stats_data_id}.json"), 'w', encoding='utf-8') as f:
+            json.dump(payload, f, ensure_ascii=False)
+        print(f"Recorded {len(values)} values of e-Stat table {stats_data_id}.")
+
+
+def parse_service_latency(items):
+    """["ndl=0.3", "gemini=1.5"] -> {"ndl": 0.3, "gemini": 1.5}"""
+    latency = {}
+    for item in items or []:
+        service, _, seconds = item.partition("=")
+        latency[service] = float(seconds)
+    return latency
+
+
+def add_server_arguments(parser):
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Uniform +/- jitter in seconds")
+    parser.add_argument("--service-latency", action="append", metavar="SERVICE=SECONDS",
+                        help="Per-service latency (ndl, estat, gemini, gemini_chunk); repeatable")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with an error")
+    parser.add_argument("--error-status", type=int, default=503, help="HTTP status of injected errors (e.g. 429, 500)")
+    parser.add_argument("--page-size", type=int, default=None, help="Cap on records per page (forces pagination)")
+    parser.add_argument("--records-per-query", type=int, default=None,
+                        help="Cycle recorded speeches up to this many results per keyword")
+    parser.add_argument("--estat-areas", type=int, default=1, help="Area codes per synthesized e-Stat table (scales row count)")
+    parser.add_argument("--seed", type=int, default=None)
+
+
+def server_from_args(args, host="127.0.0.1", port=0):
+    return StandinServer(
+        host=host,
+        port=port,
+        latency=args.latency,
+        jitter=args.jitter,
+        service_latency=parse_service_latency(args.service_latency),
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        page_size=args.page_size,
+        records_per_query=args.records_per_query,
+        recordings=Recordings(estat_areas=args.estat_areas),
+        seed=args.seed,
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline stand-in for the Diet API, e-Stat and Gemini.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    serve_parser = sub.add_parser("serve", help="Serve recorded responses")
+    serve_parser.add_argument("--host", default="127.0.0.1")
+    serve_parser.add_argument("--port", type=int, default=8765)
+    add_server_arguments(serve_parser)
+    record_parser = sub.add_parser("record", help="Record live responses into data/standin")
+    record_parser.add_argument("keywords", nargs="+")
+    record_parser.add_argument("--max-records", type=int, default=100)
+    args = parser.parse_args()
+
+    if args.command == "record":
+        record(args.keywords, args.max_records)
+    else:
+        server = server_from_args(args, host=args.host, port=args.port).start()
+        print(f"Stand-in server on {server.base_url}. Point the dashboard at it with:")
+        for name, value in server.env().items():
+            print(f"  export {name}={value}")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            server.stop()